@@ -0,0 +1,181 @@
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame as pg
+from damage import DamageTracker
+from textengine import TextEngine
+
+RESOLUTIONS = ((800, 600), (1200, 800), (1920, 1080))
+POPUP_SIZE = (200, 200)
+
+
+def make_engine(size: tuple[int, int], font: str = "couriernew") -> TextEngine:
+    window = pg.display.set_mode(size)
+    main = SimpleNamespace(screen_size=list(size), media_folder="media/", window=window, damage=DamageTracker())
+    return TextEngine(main, font)
+
+
+def timed(function, repeat: int) -> float:
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def keydown(char: str) -> pg.event.Event:
+    return pg.event.Event(pg.KEYDOWN, key=ord(char), unicode=char, mod=0)
+
+
+def bench_typing(sizes: list[int], keys: int) -> list[dict]:
+    results = []
+    engine = make_engine((1200, 800))
+    line = "Portez ce vieux whisky au juge blond qui fume."
+    for lines in sizes:
+        engine.set_text("\n".join([line] * lines))
+        engine.cursor.y, engine.cursor.x = lines // 2, len(line) // 2
+        events = [keydown(char) for char in "abcdefghij" * (keys // 10)]
+        start = time.perf_counter()
+        for event in events:
+            engine.update(event)
+        elapsed = time.perf_counter() - start
+        results.append({"lines": lines, "keys": len(events), "keys_per_second": len(events) / elapsed})
+    return results
+
+
+def bench_render(visible_lines: list[int], frames: int) -> list[dict]:
+    results = []
+    for lines in visible_lines:
+        engine = make_engine((1200, 800))
+        size = (1200, lines * engine.font_size + 20)
+        engine.main.window = pg.display.set_mode(size)
+        engine.main.screen_size = list(size)
+        engine.resize(size)
+        engine.set_text("\n".join(f"{i:>6} | " + "lorem ipsum dolor sit amet " * 6 for i in range(lines * 4)))
+        results.append({
+            "visible_lines": lines,
+            "frame_ms": timed(lambda: engine.draw(engine.main.window), frames)
+        })
+    return results
+
+
+def bench_effects(resolutions: tuple, frames: int) -> list[dict]:
+    results = []
+    for size in resolutions:
+        engine = make_engine(size)
+        engine.set_text("\n".join("The quick brown fox jumps over the lazy dog." for _ in range(200)))
+
+        def draw():
+            engine.effects.time += 1 / 60
+            engine.draw(engine.main.window)
+
+        baseline = timed(draw, frames)
+        for effect in engine.effects.available_effects:
+            engine.active_effects = [effect]
+            if effect == "particles":
+                engine.effects.particles.spawn(1000, size)
+            frame_ms = timed(draw, frames)
+            results.append({
+                "effect": effect,
+                "resolution": f"{size[0]}x{size[1]}",
+                "frame_ms": frame_ms,
+                "effect_ms": frame_ms - baseline
+            })
+        engine.active_effects = []
+    return results
+
+
+def bench_paste(sizes: list[int]) -> list[dict]:
+    results = []
+    engine = make_engine((1200, 800))
+    for lines in sizes:
+        engine.set_text("")
+        text = "\n".join(f"ligne {i} : " + "x" * 60 for i in range(lines))
+        start = time.perf_counter()
+        engine.cursor.insert_text(text)
+        elapsed = time.perf_counter() - start
+        results.append({"lines": lines, "bytes": len(text), "megabytes_per_second": len(text) / elapsed / 1e6})
+    return results
+
+
+def bench_popups() -> dict:
+    if importlib.util.find_spec("imageio") is None:
+        return {"skipped": "imageio absent"}
+    from framecache import FrameCache
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        cache = FrameCache(folder)
+        for video in sorted(glob.glob(os.path.join("media", "videos", "*.mp4"))):
+            start = time.perf_counter()
+            frames = cache.build(video, POPUP_SIZE)
+            decode = time.perf_counter() - start
+            start = time.perf_counter()
+            cached = cache.load(video, POPUP_SIZE)
+            load = time.perf_counter() - start
+            results.append({
+                "video": os.path.basename(video),
+                "frames": 0 if frames is None else len(frames),
+                "decode_s": decode,
+                "cached_load_ms": load * 1000 if cached is not None else None
+            })
+            del frames, cached
+    return {"videos": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sans affichage de NotePad--")
+    parser.add_argument("--output", help="fichier JSON de sortie (sortie standard par défaut)")
+    parser.add_argument("--quick", action="store_true", help="tailles et nombres d'images réduits")
+    parser.add_argument("--only", nargs="*", choices=["typing", "render", "effects", "paste", "popups"])
+    args = parser.parse_args()
+
+    frames = 10 if args.quick else 60
+    suites = {
+        "typing": lambda: bench_typing([1_000, 10_000] if args.quick else [1_000, 10_000, 100_000, 1_000_000], 200 if args.quick else 2000),
+        "render": lambda: bench_render([25, 50] if args.quick else [25, 50, 100], frames),
+        "effects": lambda: bench_effects(RESOLUTIONS[:1] if args.quick else RESOLUTIONS, frames),
+        "paste": lambda: bench_paste([1_000] if args.quick else [1_000, 10_000, 100_000]),
+        "popups": bench_popups
+    }
+
+    pg.init()
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pg.version.ver,
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": {}
+    }
+    for name, suite in suites.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"[benchmarks] {name}...", file=sys.stderr)
+        report["results"][name] = suite()
+    pg.quit()
+
+    output = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
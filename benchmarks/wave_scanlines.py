@@ -0,0 +1,58 @@
+import os
+import sys
+import math
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame as pg
+from effects import Effects
+
+
+def legacy_scanlines(canvas: pg.Surface) -> pg.Surface:
+    for y in range(0, canvas.get_height(), 2):
+        pg.draw.line(canvas, (0, 0, 0, 40), (0, y), (canvas.get_width(), y))
+    return canvas
+
+
+def legacy_wave(canvas: pg.Surface, result: pg.Surface, cc: float, amplitude=5, frequency=0.05) -> pg.Surface:
+    result.fill((0, 0, 0))
+    width, height = canvas.get_size()
+    for y in range(height):
+        offset = int(amplitude * math.sin(frequency * y + cc * 0.2))
+        result.blit(canvas, (offset, y), (0, y, width, 1))
+    return result
+
+
+def measure(function, frames: int) -> float:
+    function()
+    start = time.perf_counter()
+    for _ in range(frames):
+        function()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main(frames: int = 60):
+    pg.init()
+    pg.display.set_mode((1, 1))
+    print(f"{'résolution':>12} {'effet':>10} {'avant (ms)':>12} {'après (ms)':>12}")
+    for size in ((1200, 800), (1920, 1080), (2560, 1440)):
+        src = pg.Surface(size, 0, 32)
+        dst = pg.Surface(size, 0, 32)
+        src.fill((30, 30, 30))
+        effects = Effects(size, 60)
+
+        rows = [
+            ("scanlines", lambda: legacy_scanlines(src), lambda: effects.scanlines(src, dst)),
+            ("wave", lambda: legacy_wave(src, dst, effects.cc), lambda: effects.wave_distortion(src, dst)),
+        ]
+        for name, before, after in rows:
+            label = f"{size[0]}x{size[1]}"
+            print(f"{label:>12} {name:>10} {measure(before, frames):12.2f} {measure(after, frames):12.2f}")
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
@@ -0,0 +1,24 @@
+import pygame as pg
+
+
+class DamageTracker:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.rects: list[pg.Rect] = []
+        self.full = True
+
+    def add(self, rect):
+        if not self.full:
+            self.rects.append(pg.Rect(rect))
+
+    def invalidate(self):
+        self.full = True
+        self.rects.clear()
+
+    def present(self):
+        if self.full or not self.enabled:
+            pg.display.flip()
+        elif self.rects:
+            pg.display.update(self.rects)
+        self.full = False
+        self.rects.clear()
@@ -2,175 +2,257 @@ import pygame as pg
 import math
 import numpy as np
 import random
-import threading
+from particles import ParticleSystem
+from governor import QUALITY_TIERS
+
+GRADIENT_SCALE = 4
+BLUR_QUALITY = {"low": (8, 1), "medium": (4, 2), "high": (2, 2)}
+CHROMATIC_SHIFT = 5
+
+
+class PostProcessor:
+    def __init__(self, size: tuple[int, int]):
+        self.resize(size)
+
+    def resize(self, size: tuple[int, int]):
+        self.size = tuple(size)
+        self.front = pg.Surface(self.size, 0, 32)
+        self.back = pg.Surface(self.size, 0, 32)
+
+    def apply(self, effect, *args) -> pg.Surface:
+        if effect(self.front, self.back, *args) is self.back:
+            self.front, self.back = self.back, self.front
+        return self.front
+
 
 class Effects:
     def __init__(self, canvas_size, fps):
-        self.canvas_size = canvas_size
+        self.canvas_size = tuple(canvas_size)
+        self.scratch: dict[str, pg.Surface] = {}
+        self.arrays: dict[str, np.ndarray] = {}
         self.frame_count = fps
-        self.frames = []
         self.current_frame = 0
-        self.frame_delay = 0
-        self.frame_delay_counter = 0
         self.rotation = 0
-        self.spawn_interval = 50
-        self.last_spawn_time = 0
-        self.particles = []
+        self.time = 0.0
+        self.rotation_steps = 36
+        self.particles = ParticleSystem()
         self.available_effects = ["blur", "rotate", "gradient", "particles", "shake", "glitch", "scanlines", "wave", "noise", "chromatic"]
+        self.animated_effects = ["rotate", "gradient", "particles", "shake", "glitch", "wave", "noise"]
+        self.blur_radius = 8
+        self.blur_quality = "medium"
+        self.noise_intensity = 100
+        self.noise_fps = 30
+        self.noise_frames = 8
+        self.noise_key = None
+        self.noise_pool: list[pg.Surface] = []
+        self.quality = QUALITY_TIERS[0]
         self.cc = 0
 
-        threading.Thread(target=self._generate_gradient_frames).start()
-
-    def _create_particle(self) -> dict:
-        return {
-            "position": [
-                random.uniform(20, self.canvas_size[0] - 20),
-                random.uniform(20, self.canvas_size[1] - 20)
-            ],
-            "velocity": [
-                random.uniform(-1.0, 1.0),
-                random.uniform(-1.0, -0.5)
-            ],
-            "size": random.randint(4, 15),
-            "lifespan": random.uniform(1.0, 3.0)
-        }
-
-    def _draw_particle(self, particle: dict, canvas: pg.Surface) -> None:
-        x, y = particle["position"]
-        radius = int(particle["size"])
-
-        pg.draw.circle(canvas, (255, 255, 255), (int(x), int(y)), radius)
-
-        glow_radius = radius * 2
-        glow_surf = pg.Surface((glow_radius * 2, glow_radius * 2), pg.SRCALPHA)
-        pg.draw.circle(glow_surf, (20, 20, 60, 100), (glow_radius, glow_radius), glow_radius)
-        canvas.blit(glow_surf, (x - glow_radius, y - glow_radius), special_flags=pg.BLEND_RGB_ADD)
+    def set_quality(self, tier: dict):
+        self.quality = tier
+        self.particles.limit = tier["max_particles"] or self.particles.capacity
 
-    def update_particles(self, canvas: pg.Surface) -> None:
-        current_time = pg.time.get_ticks()
+    def resize(self, canvas_size: tuple[int, int]):
+        self.canvas_size = tuple(canvas_size)
+        self.scratch.clear()
+        self.arrays.clear()
 
-        if current_time - self.last_spawn_time >= self.spawn_interval:
-            self.particles.append(self._create_particle())
-            self.last_spawn_time = current_time
+    def _scratch(self, name: str, flags: int = 0) -> pg.Surface:
+        surface = self.scratch.get(name)
+        if surface is None or surface.get_size() != self.canvas_size:
+            surface = self.scratch[name] = pg.Surface(self.canvas_size, flags, 32)
+        return surface
 
-        for particle in self.particles[:]:
-            pos, vel = particle["position"], particle["velocity"]
-            pos[0] += vel[0]
-            pos[1] += vel[1]
-            particle["size"] -= 0.1
-            vel[1] += 0.01
-            particle["lifespan"] -= 1 / (self.frame_count * 2)
+    def _wave_rows(self, height: int) -> np.ndarray:
+        if self.arrays.get("wave_rows") is None or len(self.arrays["wave_rows"]) != height:
+            self.arrays["wave_rows"] = np.arange(height, dtype=np.float32)
+        return self.arrays["wave_rows"]
 
-            if particle["size"] > 0:
-                self._draw_particle(particle, canvas)
+    def _scanline_mask(self, height: int) -> np.ndarray:
+        if self.arrays.get("scanline_mask") is None or len(self.arrays["scanline_mask"]) != (height + 1) // 2:
+            self.arrays["scanline_mask"] = np.zeros(((height + 1) // 2, 1), dtype=np.uint32)
+        return self.arrays["scanline_mask"]
 
-            if particle["size"] <= 0 or particle["lifespan"] <= 0:
-                self.particles.remove(particle)
+    def update_particles(self, canvas: pg.Surface) -> None:
+        self.particles.update(canvas, self.time)
 
-    def _generate_gradient_frames(self) -> None:
+    def _gradient_strip(self) -> tuple[pg.Surface, int]:
+        width, height = self.canvas_size
+        period = 2 * max(width - 1, 1)
+        strip = self.scratch.get("gradient")
+        if strip is None or strip.get_height() != height or strip.get_width() != width + period:
+            strip_width = width + period
+            columns = np.linspace(0, strip_width - 1, -(-strip_width // GRADIENT_SCALE), dtype=np.float32)
+            rows = np.linspace(0, height - 1, -(-height // GRADIENT_SCALE), dtype=np.float32)
+            angle = math.pi * (columns[:, None] / max(width - 1, 1) + rows[None, :] / max(height - 1, 1))
+
+            brightness, amplitude = 80, 80
+            rgb = np.dstack([brightness + amplitude * np.sin(angle + shift) for shift in (0, 2, 4)]).astype(np.uint8)
+            strip = self.scratch["gradient"] = pg.transform.smoothscale(pg.surfarray.make_surface(rgb), (strip_width, height))
+        return strip, period
+
+    def animated_gradient_overlay(self, src: pg.Surface, dst: pg.Surface) -> pg.Surface:
+        strip, period = self._gradient_strip()
+        offset = self.current_frame * period // self.frame_count
+        src.blit(strip, (0, 0), (offset, 0, *self.canvas_size), special_flags=pg.BLEND_RGB_ADD)
+        self.current_frame = (self.current_frame + 1) % self.frame_count
+        return src
+
+    def rotation_angle(self) -> int:
+        step = 360 / max(1, self.rotation_steps)
+        return round(round(self.rotation / step) * step) % 360
+
+    def _array(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        array = self.arrays.get(name)
+        if array is None or array.shape != shape:
+            array = self.arrays[name] = np.empty(shape, dtype=dtype)
+        return array
+
+    def _box_blur(self, pixels: np.ndarray, radius: int, axis: int):
+        pixels = np.moveaxis(pixels, axis, 0)
+        length, size = len(pixels), 2 * radius + 1
+        sums = self._array(f"blur_sums_{axis}", (length + size, *pixels.shape[1:]), np.int32)
+        window = self._array(f"blur_window_{axis}", pixels.shape, np.int32)
+        sums[0] = 0
+        sums[1:radius + 2] = pixels[0]
+        sums[radius + 2:radius + 1 + length] = pixels[1:]
+        sums[radius + 1 + length:] = pixels[-1]
+        np.cumsum(sums, axis=0, out=sums)
+
+        np.subtract(sums[size:], sums[:length], out=window)
+        window *= round((1 << 16) / size)
+        window += 1 << 15
+        window >>= 16
+        pixels[...] = window
+
+    def _blur_settings(self) -> tuple[int, int, int]:
+        quality = self.quality["blur_quality"] or self.blur_quality
+        factor, passes = BLUR_QUALITY.get(quality, BLUR_QUALITY["medium"])
+        return factor, passes, max(1, round(self.blur_radius / factor))
+
+    def reach(self, effects: list[str]) -> int:
+        reach = 16
+        if "blur" in effects:
+            factor, passes, radius = self._blur_settings()
+            reach = max(reach, (passes * radius + 2) * factor)
+        return reach
+
+    def damage_rects(self, rect: pg.Rect, effects: list[str]) -> list[pg.Rect]:
+        reach = self.reach(effects)
+        rect = pg.Rect(rect).inflate(2 * reach, 2 * reach)
+        rects = [rect]
+        if "chromatic" in effects:
+            height = self.canvas_size[1]
+            top, bottom = max(rect.top, 0), min(rect.bottom, height)
+            if bottom > height - CHROMATIC_SHIFT:
+                band = (max(top, height - CHROMATIC_SHIFT) + CHROMATIC_SHIFT - height, bottom + CHROMATIC_SHIFT - height)
+                rects.append(pg.Rect(rect.x, band[0], rect.w, band[1] - band[0]).inflate(2 * reach, 2 * reach))
+            if top < CHROMATIC_SHIFT:
+                band = (top - CHROMATIC_SHIFT + height, min(bottom, CHROMATIC_SHIFT) - CHROMATIC_SHIFT + height)
+                rects.append(pg.Rect(rect.x, band[0], rect.w, band[1] - band[0]).inflate(2 * reach, 2 * reach))
+        return rects
+
+    def blur(self, src: pg.Surface, dst: pg.Surface) -> pg.Surface:
+        factor, passes, radius = self._blur_settings()
         width, height = self.canvas_size
-        x = np.linspace(0, 1, width)
-        y = np.linspace(0, 1, height)
-        xx, yy = np.meshgrid(x, y)
-        ratio = (xx + yy) / 2
-
-        brightness, amplitude = 80, 80
-
-        for i in range(self.frame_count):
-            phase = math.radians((i / self.frame_count) * 360)
-            r = (brightness + amplitude * np.sin(2 * math.pi * ratio + phase)).astype(np.uint8)
-            g = (brightness + amplitude * np.sin(2 * math.pi * ratio + phase + 2)).astype(np.uint8)
-            b = (brightness + amplitude * np.sin(2 * math.pi * ratio + phase + 4)).astype(np.uint8)
-            a = np.full_like(r, 60, dtype=np.uint8)
-
-            frame = np.dstack((r, g, b, a))
-            surface = pg.image.frombuffer(frame.flatten(), (width, height), "RGBA").convert_alpha()
-            self.frames.append(surface)
-
-    def animated_gradient_overlay(self, canvas: pg.Surface) -> pg.Surface:
-        result = canvas.copy()
-        if len(self.frames) == self.frame_count:
-            gradient = self.frames[self.current_frame]
-            result.blit(pg.transform.scale(gradient, canvas.get_size()), (0, 0), special_flags=pg.BLEND_RGBA_ADD)
-
-            self.frame_delay_counter += 1
-            if self.frame_delay_counter >= self.frame_delay:
-                self.current_frame = (self.current_frame + 1) % self.frame_count
-                self.frame_delay_counter = 0
-        return result
-
-    def rotate(self, canvas: pg.Surface) -> pg.Surface:
-        return pg.transform.rotate(canvas.copy(), self.rotation)
-
-    def blur(self, canvas: pg.Surface, passes: int = 2, offset: int = 3) -> pg.Surface:
-        result = canvas.copy()
-        for i in range(1, passes + 1):
-            shifted = pg.transform.scale(canvas, self.canvas_size)
-            shifted.set_alpha(30)
-            result.blit(shifted, (offset * i, offset * i))
-            result.blit(shifted, (-offset * i, -offset * i))
-        return result
-
-    def glitch(self, canvas: pg.Surface) -> pg.Surface:
-        result = canvas.copy()
-        arr = pg.surfarray.pixels3d(result)
-        height = arr.shape[1]
+        small_size = (max(1, width // factor), max(1, height // factor))
+        small = self.scratch.get("blur")
+        if small is None or small.get_size() != small_size:
+            small = self.scratch["blur"] = pg.Surface(small_size, 0, 32)
+
+        pg.transform.smoothscale(src, small_size, small)
+        pixels = pg.surfarray.pixels3d(small)
+        work = self._array("blur_pixels", pixels.shape, np.uint8)
+        work[...] = pixels
+        for _ in range(passes):
+            self._box_blur(work, radius, 0)
+            self._box_blur(work, radius, 1)
+        pixels[...] = work
+        del pixels
+        pg.transform.smoothscale(small, self.canvas_size, dst)
+        return dst
+
+    @staticmethod
+    def _roll_rows(src, dst, offset: int):
+        if offset > 0:
+            dst[offset:] = src[:-offset]
+            dst[:offset] = src[-offset:]
+        elif offset < 0:
+            dst[:offset] = src[-offset:]
+            dst[offset:] = src[:-offset]
+        else:
+            dst[:] = src
+
+    def glitch(self, src: pg.Surface, dst: pg.Surface) -> pg.Surface:
+        dst.blit(src, (0, 0))
+        src_arr = pg.surfarray.pixels3d(src)
+        dst_arr = pg.surfarray.pixels3d(dst)
+        height = dst_arr.shape[1]
 
         for _ in range(5):
             y = random.randint(0, height - 10)
             h = random.randint(1, 5)
             offset = random.randint(-20, 20)
-            arr[:, y:y + h] = np.roll(arr[:, y:y + h], offset, axis=0)
-
-        del arr
-        return result
-
-    def scanlines(self, canvas: pg.Surface) -> pg.Surface:
-        result = canvas.copy()
-        for y in range(0, result.get_height(), 2):
-            pg.draw.line(result, (0, 0, 0, 40), (0, y), (result.get_width(), y))
-        return result
-
-    def wave_distortion(self, canvas: pg.Surface, amplitude=5, frequency=0.05) -> pg.Surface:
-        result = pg.Surface(canvas.get_size())
-        width, height = canvas.get_size()
-
-        for y in range(height):
-            offset = int(amplitude * math.sin(frequency * y + self.cc * 0.2))
-            row = canvas.subsurface((0, y, width, 1))
-            result.blit(row, (offset, y))
-
-        return result
-
-    def noise_overlay(self, canvas: pg.Surface, intensity=100, update_every=1) -> pg.Surface:
-        if not hasattr(self, "_noise_frame_count"):
-            self._noise_frame_count = 0
-            self._cached_noise = None
-
-        if self._noise_frame_count % update_every == 0 or self._cached_noise is None:
-            noise = np.random.randint(0, intensity, (128, 128, 3), dtype=np.uint8)
-            self._cached_noise = pg.surfarray.make_surface(noise.transpose([1, 0, 2]))
-            self._cached_noise.set_alpha(20)
-        self._noise_frame_count += 1
-
-        result = canvas.copy()
-        scaled_noise = pg.transform.smoothscale(self._cached_noise, canvas.get_size())
-        result.blit(scaled_noise, (0, 0), special_flags=pg.BLEND_RGB_ADD)
-        return result
-
-    def chromatic_aberration(self, canvas: pg.Surface, shift=5) -> pg.Surface:
-        result = canvas.copy()
-        arr = pg.surfarray.pixels3d(result)
-        r, g, b = arr[:,:,0], arr[:,:,1], arr[:,:,2]
-
-        shifted_r = np.roll(r, shift, axis=1)
-        shifted_b = np.roll(b, -shift, axis=1)
-
-        arr[:,:,0] = shifted_r
-        arr[:,:,2] = shifted_b
-
-        del arr
-        return result
+            self._roll_rows(src_arr[:, y:y + h], dst_arr[:, y:y + h], offset)
+
+        del src_arr, dst_arr
+        return dst
+
+    def scanlines(self, src: pg.Surface, dst: pg.Surface) -> pg.Surface:
+        rows = pg.surfarray.pixels2d(src).T[::2]
+        np.multiply(rows, self._scanline_mask(src.get_height()), out=rows)
+        del rows
+        return src
+
+    def wave_distortion(self, src: pg.Surface, dst: pg.Surface, amplitude=5, frequency=0.05) -> pg.Surface:
+        width, height = src.get_size()
+        offsets = (amplitude * np.sin(frequency * self._wave_rows(height) + self.cc * 0.2)).astype(np.intp)
+        starts = np.flatnonzero(np.diff(offsets)) + 1
+
+        src_rows = pg.surfarray.pixels2d(src).T
+        dst_rows = pg.surfarray.pixels2d(dst).T
+        src_flat = src_rows.reshape(-1)
+        dst_flat = dst_rows.reshape(-1)
+
+        for top, bottom in zip([0, *starts.tolist()], [*starts.tolist(), height]):
+            offset = int(offsets[top])
+            first, last = top * width, bottom * width
+            if offset >= 0:
+                dst_flat[first + offset:last] = src_flat[first:last - offset]
+                dst_rows[top:bottom, :offset] = 0
+            else:
+                dst_flat[first:last + offset] = src_flat[first - offset:last]
+                dst_rows[top:bottom, offset:] = 0
+
+        del src_rows, dst_rows, src_flat, dst_flat
+        return dst
+
+    def _noise_pool(self) -> list[pg.Surface]:
+        key = (self.canvas_size, self.noise_intensity, self.noise_frames)
+        if self.noise_key != key:
+            self.noise_key = key
+            self.noise_pool = []
+            for _ in range(self.noise_frames):
+                noise = np.random.randint(0, max(1, self.noise_intensity), (128, 128, 3), dtype=np.uint8)
+                self.noise_pool.append(pg.transform.smoothscale(pg.surfarray.make_surface(noise), self.canvas_size))
+        return self.noise_pool
+
+    def noise_overlay(self, src: pg.Surface, dst: pg.Surface) -> pg.Surface:
+        pool = self._noise_pool()
+        frame = int(self.time * self.noise_fps) % len(pool)
+        src.blit(pool[frame], (0, 0), special_flags=pg.BLEND_RGB_ADD)
+        return src
+
+    def chromatic_aberration(self, src: pg.Surface, dst: pg.Surface, shift=CHROMATIC_SHIFT) -> pg.Surface:
+        src_arr = pg.surfarray.pixels3d(src)
+        dst_arr = pg.surfarray.pixels3d(dst)
+
+        dst_arr[:, :, 1] = src_arr[:, :, 1]
+        self._roll_rows(src_arr[:, :, 0].T, dst_arr[:, :, 0].T, shift)
+        self._roll_rows(src_arr[:, :, 2].T, dst_arr[:, :, 2].T, -shift)
+
+        del src_arr, dst_arr
+        return dst
 
 
 
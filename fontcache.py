@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+import pygame as pg
+
+FONT_CACHE = ".fonts.json"
+
+
+def _cache_key() -> dict:
+    return {"pygame": pg.version.ver, "platform": sys.platform}
+
+
+def available_fonts(refresh: bool = False) -> list[str]:
+    if not refresh and os.path.exists(FONT_CACHE):
+        try:
+            with open(FONT_CACHE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == _cache_key():
+                return cached["fonts"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    fonts = pg.font.get_fonts()
+    try:
+        with open(FONT_CACHE, "w", encoding="utf-8") as f:
+            json.dump({"key": _cache_key(), "fonts": fonts}, f)
+    except OSError:
+        pass
+    return fonts
+
+
+def font_exists(name: str) -> bool:
+    return name in available_fonts() or name in available_fonts(refresh=True)
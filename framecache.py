@@ -0,0 +1,102 @@
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import pygame as pg
+
+
+class FrameCache:
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    @staticmethod
+    def _digest(*parts) -> str:
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+    def path_for(self, source: str, size: tuple[int, int]) -> str:
+        source = os.path.abspath(source)
+        stat = os.stat(source)
+        prefix = self._digest(source)
+        return os.path.join(self.folder, f"{prefix}-{self._digest(stat.st_mtime_ns, stat.st_size)}-{size[0]}x{size[1]}.npy")
+
+    def load(self, source: str, size: tuple[int, int]):
+        import numpy as np
+
+        path = self.path_for(source, size)
+        if not os.path.exists(path):
+            return None
+        try:
+            frames = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if frames.ndim != 4 or frames.shape[1:] != (size[1], size[0], 3) or not len(frames):
+            return None
+        return frames
+
+    def build(self, source: str, size: tuple[int, int], cancelled=None):
+        import imageio.v3 as iio
+        import numpy as np
+
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path_for(source, size)
+        name = os.path.basename(path) + "."
+        raw_fd, raw_path = tempfile.mkstemp(prefix=name, suffix=".raw", dir=self.folder)
+        temp_path = None
+        count = 0
+        try:
+            temp_fd, temp_path = tempfile.mkstemp(prefix=name, suffix=".tmp", dir=self.folder)
+            os.close(temp_fd)
+            with os.fdopen(raw_fd, "wb") as raw:
+                for frame in iio.imiter(source):
+                    if cancelled and cancelled():
+                        return None
+                    height, width = frame.shape[:2]
+                    mode = 'RGB' if frame.shape[2] == 3 else 'RGBA'
+                    surface = pg.image.frombuffer(frame.astype('uint8').tobytes(), (width, height), mode)
+                    raw.write(pg.image.tobytes(pg.transform.scale(surface, size), 'RGB'))
+                    count += 1
+            if not count:
+                return None
+
+            shape = (count, size[1], size[0], 3)
+            frames = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.uint8, shape=shape)
+            frames[:] = np.memmap(raw_path, dtype=np.uint8, mode="r", shape=shape)
+            frames.flush()
+            del frames
+            os.replace(temp_path, path)
+        finally:
+            for leftover in (raw_path, temp_path):
+                if leftover and os.path.exists(leftover):
+                    os.remove(leftover)
+
+        prefix, version = os.path.basename(path).split("-")[:2]
+        for stale in glob.glob(os.path.join(self.folder, prefix + "-*.npy")):
+            if os.path.basename(stale).split("-")[1] != version:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+        return self.load(source, size)
+
+    def get(self, source: str, size: tuple[int, int], cancelled=None):
+        frames = self.load(source, size)
+        return frames if frames is not None else self.build(source, size, cancelled)
+
+
+def warm(media_folder: str, size: tuple[int, int]) -> int:
+    cache = FrameCache(os.path.join(media_folder, ".cache"))
+    videos = sorted(glob.glob(os.path.join(media_folder, "videos", "*.mp4")))
+    for i, video in enumerate(videos, 1):
+        status = "en cache" if cache.load(video, size) is not None else "décodage"
+        print(f"[{i}/{len(videos)}] {os.path.basename(video)} : {status}")
+        cache.get(video, size)
+    return len(videos)
+
+
+if __name__ == "__main__":
+    with open("settings.json", "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    warm(settings.get("media_folder", ""), (side, side))
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+import pygame as pg
+
+
+class GlyphAtlas:
+    def __init__(self, font_name: str, font_size: int, color: tuple[int, int, int], bold: bool = True, max_glyphs: int = 2048, max_rotated: int = 8192):
+        self.max_glyphs = max_glyphs
+        self.max_rotated = max_rotated
+        self.glyphs: OrderedDict[tuple, pg.Surface] = OrderedDict()
+        self.rotated: OrderedDict[tuple, pg.Surface] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.config = None
+        self.font = None
+        self.configure(font_name, font_size, color, bold)
+
+    def configure(self, font_name: str, font_size: int, color: tuple[int, int, int], bold: bool = True):
+        config = (font_name, font_size, bold, tuple(color[:3]))
+        if config == self.config:
+            return
+
+        if self.config is None or config[:3] != self.config[:3]:
+            self.font = pg.font.SysFont(font_name, font_size)
+            self.font.set_bold(bold)
+
+        self.config = config
+        self.glyphs.clear()
+        self.rotated.clear()
+
+    def get(self, char: str) -> pg.Surface:
+        key = self.config + (char,)
+        glyph = self.glyphs.get(key)
+        if glyph is not None:
+            self.hits += 1
+            self.glyphs.move_to_end(key)
+            return glyph
+
+        self.misses += 1
+        glyph = self.font.render(char, True, self.config[3])
+        self.glyphs[key] = glyph
+        if len(self.glyphs) > self.max_glyphs:
+            self.glyphs.popitem(last=False)
+        return glyph
+
+    def get_rotated(self, char: str, angle: int) -> pg.Surface:
+        if not angle:
+            return self.get(char)
+        key = self.config + (char, angle)
+        glyph = self.rotated.get(key)
+        if glyph is not None:
+            self.hits += 1
+            self.rotated.move_to_end(key)
+            return glyph
+
+        self.misses += 1
+        glyph = pg.transform.rotate(self.get(char), angle)
+        self.rotated[key] = glyph
+        if len(self.rotated) > self.max_rotated:
+            self.rotated.popitem(last=False)
+        return glyph
+
+    def width(self, char: str) -> int:
+        return self.get(char).get_width()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.glyphs),
+            "rotated": len(self.rotated),
+            "capacity": self.max_glyphs,
+            "hit_rate": self.hits / lookups if lookups else 1.0
+        }
@@ -0,0 +1,60 @@
+from collections import deque
+
+QUALITY_TIERS = (
+    {"name": "maximale", "blur_quality": None, "max_particles": None, "popup_step": 1, "effect_step": 1},
+    {"name": "haute", "blur_quality": "low", "max_particles": None, "popup_step": 1, "effect_step": 1},
+    {"name": "moyenne", "blur_quality": "low", "max_particles": 1024, "popup_step": 2, "effect_step": 1},
+    {"name": "basse", "blur_quality": "low", "max_particles": 256, "popup_step": 3, "effect_step": 2},
+)
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms: float = 1000 / 60, enabled: bool = True, window: int = 30, headroom: float = 0.7):
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self.headroom = headroom
+        self.samples: deque[float] = deque(maxlen=window)
+        self.level = 0
+        self.calm = 0
+        self.patience = 1
+        self.restored = False
+
+    @property
+    def tier(self) -> dict:
+        return QUALITY_TIERS[self.level]
+
+    def average(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def update(self, frame_ms: float) -> bool:
+        if not self.enabled:
+            return False
+        self.samples.append(frame_ms)
+        if len(self.samples) < self.samples.maxlen:
+            return False
+
+        average = self.average()
+        self.samples.clear()
+        restored, self.restored = self.restored, False
+        if average > self.budget_ms:
+            self.calm = 0
+            if restored:
+                self.patience = min(self.patience * 2, 32)
+            if self.level < len(QUALITY_TIERS) - 1:
+                self.level += 1
+                return True
+            return False
+
+        if restored:
+            self.patience = 1
+        if average < self.budget_ms * self.headroom and self.level > 0:
+            self.calm += 1
+            if self.calm >= self.patience:
+                self.calm = 0
+                self.level -= 1
+                self.restored = True
+                return True
+        return False
+
+    def status(self) -> str:
+        return f"Qualité : {self.tier['name']}"
@@ -0,0 +1,78 @@
+import time
+from collections import deque
+
+
+def end_of(y: int, x: int, text: str) -> tuple[int, int]:
+    newlines = text.count('\n')
+    if not newlines:
+        return y, x + len(text)
+    return y + newlines, len(text) - text.rfind('\n') - 1
+
+
+class EditHistory:
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, coalesce_delay: float = 1.0, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.coalesce_delay = coalesce_delay
+        self.undo_stack: deque[list] = deque()
+        self.redo_stack: list[list] = []
+        self.bytes = 0
+        self.last_time = 0.0
+
+    @staticmethod
+    def _size(removed: str, inserted: str) -> int:
+        return len(removed.encode("utf-8")) + len(inserted.encode("utf-8"))
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.bytes = 0
+
+    def _coalesce(self, y: int, x: int, removed: str, inserted: str, size: int) -> bool:
+        if not self.undo_stack or self.clock() - self.last_time > self.coalesce_delay:
+            return False
+        last = self.undo_stack[-1]
+        if inserted and not removed and len(inserted) == 1 and inserted != '\n':
+            if not last[2] and '\n' not in last[3] and (y, x) == (last[0], last[1] + len(last[3])):
+                last[3] += inserted
+                last[4] += size
+                return True
+        elif removed and not inserted and len(removed) == 1 and removed != '\n':
+            if not last[3] and '\n' not in last[2] and y == last[0] and x + 1 == last[1]:
+                last[1] = x
+                last[2] = removed + last[2]
+                last[4] += size
+                return True
+        return False
+
+    def record(self, y: int, x: int, removed: str, inserted: str):
+        while self.redo_stack:
+            self.bytes -= self.redo_stack.pop()[4]
+        size = self._size(removed, inserted)
+        if size > self.max_bytes:
+            self.clear()
+            return
+
+        if not self._coalesce(y, x, removed, inserted, size):
+            self.undo_stack.append([y, x, removed, inserted, size])
+        self.bytes += size
+        self.last_time = self.clock()
+
+        while self.bytes > self.max_bytes:
+            self.bytes -= self.undo_stack.popleft()[4]
+
+    def pop_undo(self) -> list:
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self.redo_stack.append(edit)
+        self.last_time = 0.0
+        return edit
+
+    def pop_redo(self) -> list:
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self.undo_stack.append(edit)
+        self.last_time = 0.0
+        return edit
@@ -0,0 +1,229 @@
+import os
+import queue
+import struct
+import threading
+import time
+from textbuffer import TextBuffer
+
+MAGIC = b"NPJ2"
+BASE_EMPTY, BASE_FILE, BASE_SNAPSHOT = 0, 1, 2
+OP_INSERT, OP_DELETE = 1, 2
+
+HEADER = struct.Struct("<4sBqqI")
+INSERT = struct.Struct("<BQQI")
+DELETE = struct.Struct("<BQQQQ")
+
+
+def file_stamp(path: str) -> tuple[int, int]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return -1, -1
+    return stat.st_mtime_ns, stat.st_size
+
+
+def encode_header(base: int, path: str = "") -> bytes:
+    encoded = path.encode("utf-8")
+    mtime, size = file_stamp(path) if base == BASE_FILE else (0, 0)
+    return HEADER.pack(MAGIC, base, mtime, size, len(encoded)) + encoded
+
+
+class EditJournal:
+    def __init__(self, filename: str, flush_interval: float = 1.0, compact_bytes: int = 4 * 1024 * 1024, folder: str = None):
+        directory, name = os.path.split(os.path.abspath(filename))
+        directory = folder or directory
+        self.path = os.path.join(directory, f".{name}.journal")
+        self.snapshot_path = os.path.join(directory, f".{name}.snapshot")
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.pending = bytearray()
+        self.last_flush = time.monotonic()
+        self.size = 0
+        self.checkpoint = None
+        self.header = encode_header(BASE_EMPTY)
+        self.tasks: queue.Queue = queue.Queue()
+        self.file = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def start(self, base: int, path: str = ""):
+        self.pending.clear()
+        self.tasks.put(("reset", encode_header(base, path)))
+
+    def record_insert(self, y: int, x: int, text: str):
+        encoded = text.encode("utf-8")
+        self.pending += INSERT.pack(OP_INSERT, y, x, len(encoded))
+        self.pending += encoded
+
+    def record_delete(self, y: int, x: int, end_y: int, end_x: int):
+        self.pending += DELETE.pack(OP_DELETE, y, x, end_y, end_x)
+
+    def flush(self):
+        if self.pending:
+            self.size += len(self.pending)
+            self.tasks.put(("append", bytes(self.pending)))
+            self.pending.clear()
+        self.last_flush = time.monotonic()
+
+    def tick(self, buffer: TextBuffer):
+        if time.monotonic() - self.last_flush < self.flush_interval:
+            return
+        self.flush()
+        if self.size > self.compact_bytes:
+            self.compact(buffer)
+
+    def compact(self, buffer: TextBuffer):
+        self.flush()
+        self.size = 0
+        self.tasks.put(("compact", buffer.snapshot()))
+
+    def mark(self) -> object:
+        self.flush()
+        token = object()
+        self.tasks.put(("mark", token))
+        return token
+
+    def rebase(self, token: object, path: str):
+        self.tasks.put(("rebase", (token, encode_header(BASE_FILE, os.path.abspath(path)))))
+
+    def close(self, discard: bool = False):
+        self.flush()
+        self.tasks.put(("close", discard))
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            action, payload = self.tasks.get()
+            if action == "append":
+                self._append(payload)
+            elif action == "reset":
+                self._reset(payload)
+            elif action == "compact":
+                self._compact(payload)
+            elif action == "mark":
+                self.checkpoint = (payload, self.file.tell() if self.file else len(self.header))
+            elif action == "rebase":
+                self._rebase(*payload)
+            elif action == "close":
+                if self.file:
+                    self.file.close()
+                    self.file = None
+                if payload:
+                    self._remove_files()
+                return
+
+    def _remove_files(self):
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _reset(self, header: bytes):
+        if self.file:
+            self.file.close()
+            self.file = None
+        self._remove_files()
+        self.header = header
+        self.checkpoint = None
+
+    def _append(self, data: bytes):
+        if self.file is None:
+            self.file = open(self.path, "ab")
+            if not self.file.tell():
+                self.file.write(self.header)
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _rewrite(self, header: bytes, records: bytes = b""):
+        if self.file:
+            self.file.close()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(header + records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.file = open(self.path, "ab")
+        self.header = header
+        self.checkpoint = None
+
+    def _compact(self, blocks: list):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            for chunk in TextBuffer.iter_chunks(blocks):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self._rewrite(encode_header(BASE_SNAPSHOT))
+
+    def _rebase(self, token: object, header: bytes):
+        if not self.checkpoint or self.checkpoint[0] is not token:
+            return
+        if self.file is None:
+            self._reset(header)
+            return
+        self.file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(self.checkpoint[1])
+            tail = f.read()
+        self._rewrite(header, tail)
+        if os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+
+    def read(self) -> tuple[int, str, tuple[int, int], list[tuple]]:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size or data[:4] != MAGIC:
+            return BASE_EMPTY, "", (0, 0), []
+
+        _, base, mtime, file_size, length = HEADER.unpack_from(data)
+        offset = HEADER.size + length
+        path = data[HEADER.size:offset].decode("utf-8")
+        ops = []
+        while offset < len(data):
+            if data[offset] == OP_INSERT and offset + INSERT.size <= len(data):
+                _, y, x, size = INSERT.unpack_from(data, offset)
+                end = offset + INSERT.size + size
+                if end > len(data):
+                    break
+                ops.append((OP_INSERT, y, x, data[offset + INSERT.size:end].decode("utf-8")))
+                offset = end
+            elif data[offset] == OP_DELETE and offset + DELETE.size <= len(data):
+                ops.append(DELETE.unpack_from(data, offset))
+                offset += DELETE.size
+            else:
+                break
+        return base, path, (mtime, file_size), ops
+
+    def has_recovery(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        base, _, _, ops = self.read()
+        return bool(ops) or base == BASE_SNAPSHOT
+
+    def set_aside(self):
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.replace(path, path + ".bad")
+
+    def replay(self, buffer: TextBuffer, load_file) -> int:
+        base, path, stamp, ops = self.read()
+        recovered = TextBuffer()
+        if base == BASE_SNAPSHOT:
+            with open(self.snapshot_path, "r", encoding="utf-8", newline="") as f:
+                recovered.set_text(f.read())
+        elif base == BASE_FILE:
+            if file_stamp(path) != stamp:
+                raise ValueError(f"'{path}' a été modifié depuis le journal")
+            load_file(recovered, path)
+            recovered.finish_loading()
+
+        for op in ops:
+            if op[0] == OP_INSERT:
+                recovered.insert(op[1], op[2], op[3])
+            else:
+                recovered.delete(*op[1:])
+        buffer.adopt(recovered)
+        self.size = os.path.getsize(self.path)
+        return len(ops)
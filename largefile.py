@@ -0,0 +1,83 @@
+import mmap
+import os
+import threading
+from array import array
+
+INDEX_CHUNK = 8 * 1024 * 1024
+
+
+class MappedFile:
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.starts = array('q', [0])
+        self.scanned = 0
+        self.done = self.size == 0
+
+        while not self.done and len(self.starts) < 2:
+            self._index_chunk()
+        self.thread = threading.Thread(target=self._index, daemon=True)
+        self.thread.start()
+
+    def _index_chunk(self):
+        import numpy as np
+
+        end = min(self.size, self.scanned + INDEX_CHUNK)
+        chunk = np.frombuffer(self.map, dtype=np.uint8, count=end - self.scanned, offset=self.scanned)
+        newlines = np.flatnonzero(chunk == 10) + (self.scanned + 1)
+        self.starts.frombytes(newlines.astype(np.int64).tobytes())
+        del chunk
+        if hasattr(mmap, "MADV_DONTNEED"):
+            start = self.scanned - self.scanned % mmap.PAGESIZE
+            self.map.madvise(mmap.MADV_DONTNEED, start, end - start)
+        self.scanned = end
+        self.done = end == self.size
+
+    def _index(self):
+        while not self.done:
+            self._index_chunk()
+
+    def progress(self) -> float:
+        return self.scanned / self.size if self.size else 1.0
+
+    def line_count(self) -> int:
+        done = self.done
+        return len(self.starts) - (0 if done else 1)
+
+    def _span(self, first: int, last: int) -> tuple[int, int]:
+        end = self.starts[last + 1] - 1 if last + 1 < len(self.starts) else self.size
+        return self.starts[first], end
+
+    def decode(self, first: int, last: int) -> str:
+        start, end = self._span(first, last)
+        text = self.map[start:end].decode(self.encoding, errors="replace")
+        return text.replace("\r\n", "\n").removesuffix("\r")
+
+    def line(self, y: int) -> str:
+        return self.decode(y, y)
+
+
+class MappedBlock:
+    def __init__(self, source: MappedFile, start: int, count: int):
+        self.source = source
+        self.start = start
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.source.line(self.start + index)
+
+    def __iter__(self):
+        return iter(self.text().split("\n"))
+
+    def text(self) -> str:
+        return self.source.decode(self.start, self.start + self.count - 1)
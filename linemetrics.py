@@ -0,0 +1,106 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from glyphcache import GlyphAtlas
+from textbuffer import TextBuffer
+
+
+def _bound(value: int) -> np.int32:
+    return np.int32(min(max(value, -2 ** 31), 2 ** 31 - 1))
+
+
+class LineMetrics:
+    def __init__(self, buffer: TextBuffer, glyphs: GlyphAtlas, max_lines: int = 1024):
+        self.buffer = buffer
+        self.glyphs = glyphs
+        self.max_lines = max_lines
+        self.lines: OrderedDict[int, tuple[str, np.ndarray]] = OrderedDict()
+        self.spans: dict[int, tuple[int, int]] = {}
+        self.config = glyphs.config[:3]
+        buffer.listeners.append(self._on_change)
+
+    def _on_change(self, y: int, removed: int, added: int, span: tuple[int, int] = None):
+        kept = y + min(removed, added)
+        for line in range(y, kept):
+            if line in self.lines:
+                start, tail = span if span is not None and line == y else (0, 0)
+                previous = self.spans.get(line)
+                if previous is not None:
+                    start, tail = min(start, previous[0]), min(tail, previous[1])
+                self.spans[line] = (start, tail)
+
+        delta = added - removed
+        if not delta:
+            return
+        shifted = OrderedDict()
+        spans = {}
+        for line, entry in self.lines.items():
+            if line < kept:
+                shifted[line] = entry
+                if line in self.spans:
+                    spans[line] = self.spans[line]
+            elif line >= y + removed:
+                shifted[line + delta] = entry
+                if line in self.spans:
+                    spans[line + delta] = self.spans[line]
+        self.lines = shifted
+        self.spans = spans
+
+    def _measure(self, text: str) -> np.ndarray:
+        return np.fromiter(map(self.glyphs.width, text), dtype=np.int32, count=len(text))
+
+    def prefix(self, y: int) -> np.ndarray:
+        if self.glyphs.config[:3] != self.config:
+            self.lines.clear()
+            self.spans.clear()
+            self.config = self.glyphs.config[:3]
+
+        text = self.buffer.line(y)
+        entry = self.lines.get(y)
+        span = self.spans.pop(y, None)
+        if entry is not None and span is None and entry[0] == text:
+            self.lines.move_to_end(y)
+            return entry[1]
+
+        old_text, old_widths = entry if entry is not None else ("", np.zeros(1, dtype=np.int32))
+        start, tail = span if span is not None else (0, 0)
+        common = min(start, len(old_text), len(text))
+        suffix = min(tail, len(old_text) - common, len(text) - common)
+        end = len(text) - suffix
+
+        widths = np.empty(len(text) + 1, dtype=np.int32)
+        widths[:common + 1] = old_widths[:common + 1]
+        np.cumsum(self._measure(text[common:end]), out=widths[common + 1:end + 1])
+        widths[common + 1:end + 1] += widths[common]
+        if suffix:
+            old_end = len(old_text) - suffix
+            np.add(old_widths[old_end + 1:], widths[end] - old_widths[old_end], out=widths[end + 1:])
+
+        self.lines[y] = (text, widths)
+        self.lines.move_to_end(y)
+        if len(self.lines) > self.max_lines:
+            line, _ = self.lines.popitem(last=False)
+            self.spans.pop(line, None)
+        return widths
+
+    def x_at(self, y: int, column: int) -> int:
+        return int(self.prefix(y)[column])
+
+    def visible_columns(self, y: int, left: float, right: float) -> tuple[int, int]:
+        widths = self.prefix(y)
+        first = max(0, int(np.searchsorted(widths, _bound(math.floor(left)), side="right")) - 1)
+        last = min(len(widths) - 1, int(np.searchsorted(widths, _bound(math.floor(right)), side="right")))
+        return first, last
+
+    def column_at(self, y: int, x: float) -> int:
+        widths = self.prefix(y)
+        i = int(np.searchsorted(widths, _bound(math.ceil(x)), side="left"))
+        if i >= len(widths):
+            return len(widths) - 1
+        if i > 0 and x - widths[i - 1] < widths[i] - x:
+            return i - 1
+        return i
+
+    def hit_test(self, x: float, y: float, line_height: int) -> tuple[int, int]:
+        line = min(max(0, int(y // line_height)), len(self.buffer) - 1)
+        return line, self.column_at(line, x)
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+import pygame as pg
+from glyphcache import GlyphAtlas
+from linemetrics import LineMetrics
+from textbuffer import TextBuffer
+
+TILE_COLUMNS = 256
+
+
+class LineSurfaceCache:
+    def __init__(self, buffer: TextBuffer, glyphs: GlyphAtlas, metrics: LineMetrics, max_bytes: int = 64 * 1024 * 1024):
+        self.buffer = buffer
+        self.glyphs = glyphs
+        self.metrics = metrics
+        self.max_bytes = max_bytes
+        self.tiles: OrderedDict[tuple[int, int], tuple[pg.Surface, int]] = OrderedDict()
+        self.bytes = 0
+        self.frame = 0
+        self.renders = 0
+        self.config = glyphs.config
+        buffer.listeners.append(self._on_change)
+
+    def _on_change(self, y: int, removed: int, added: int, span: tuple[int, int] = None):
+        delta = added - removed
+        tiles = OrderedDict()
+        for (line, tile), entry in self.tiles.items():
+            if line < y:
+                tiles[line, tile] = entry
+            elif line >= y + removed:
+                tiles[line + delta, tile] = entry
+            else:
+                self.bytes -= self._size(entry[0])
+        self.tiles = tiles
+
+    @staticmethod
+    def _size(surface: pg.Surface) -> int:
+        return surface.get_width() * surface.get_height() * 4
+
+    def clear(self):
+        self.tiles.clear()
+        self.bytes = 0
+
+    def begin_frame(self):
+        self.frame += 1
+        if self.glyphs.config != self.config:
+            self.clear()
+            self.config = self.glyphs.config
+
+    def _render_tile(self, y: int, line: str, tile: int) -> pg.Surface:
+        start = tile * TILE_COLUMNS
+        end = min(len(line), start + TILE_COLUMNS)
+        widths = self.metrics.prefix(y)
+        offsets = (widths[start:end + 1] - widths[start]).tolist()
+        glyphs = [self.glyphs.get(line[i]) for i in range(start, end)]
+        height = max([self.glyphs.font.get_height(), *(glyph.get_height() for glyph in glyphs)])
+        surface = pg.Surface((max(1, offsets[-1]), height), pg.SRCALPHA)
+        surface.fill((*self.glyphs.config[3], 0))
+        surface.blits([(glyph, (offset, 0)) for glyph, offset in zip(glyphs, offsets)], False)
+        self.renders += 1
+        return surface
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self.tiles:
+            key, (surface, frame) = next(iter(self.tiles.items()))
+            if frame == self.frame:
+                break
+            del self.tiles[key]
+            self.bytes -= self._size(surface)
+
+    def draw(self, canvas: pg.Surface, y: int, line: str, first: int, last: int, x: float, y_offset: float):
+        if first >= last:
+            return
+        widths = self.metrics.prefix(y)
+        for tile in range(first // TILE_COLUMNS, (last - 1) // TILE_COLUMNS + 1):
+            entry = self.tiles.get((y, tile))
+            if entry is None:
+                surface = self._render_tile(y, line, tile)
+                self.bytes += self._size(surface)
+            else:
+                surface = entry[0]
+            self.tiles[y, tile] = (surface, self.frame)
+            self.tiles.move_to_end((y, tile))
+            canvas.blit(surface, (x + int(widths[tile * TILE_COLUMNS]), y_offset))
+        self._evict()
+
+    def stats(self) -> dict:
+        return {
+            "tiles": len(self.tiles),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "renders": self.renders
+        }
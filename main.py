@@ -1,82 +1,196 @@
 import os
 import sys
-import threading
 import time
 import random
 import json
 import pygame as pg
-from pyvidplayer2 import Video
-from textengine import TextEngine
+from fontcache import available_fonts, font_exists
 from menu import Menu
 from popup import Popup
+from framecache import FrameCache
+from damage import DamageTracker
+from governor import QualityGovernor
+from profiler import Profiler
+from replay import Recorder
+from saver import BackgroundSaver
+from journal import EditJournal, BASE_EMPTY, BASE_FILE
+
+POPUP_EVENT = pg.USEREVENT + 1
 
 def get_luminance(color: pg.Color) -> float:
     r, g, b = color[:3]
     return 0.299 * r + 0.587 * g + 0.114 * b
 
 class Main:
-    def __init__(self, screen_size: tuple[int, int]):
+    def __init__(self, screen_size: tuple[int, int], seed: int = None, settings: dict = None, journal_folder: str = None,
+                 deferred: bool = False, verbose: bool = False, launched: float = None):
         self.screen_size = [screen_size[0] + 20, screen_size[1] + 20]
         self.window = pg.display.set_mode(self.screen_size, pg.RESIZABLE)
         self.clock = pg.time.Clock()
         pg.display.set_caption("NotePad--")
 
-        with open("settings.json", "r", encoding="utf-8") as f:
-            self.settings: dict = json.load(f)
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        random.seed(self.seed)
+        self.recorder: Recorder = None
+        self.replaying = False
+        self.journal_folder = journal_folder
+        self.verbose = verbose
+        self.launched = time.perf_counter() if launched is None else launched
+        self.first_frame = False
+
+        if settings is None:
+            with open("settings.json", "r", encoding="utf-8") as f:
+                settings = json.load(f)
+        self.settings: dict = settings
 
         self.music_playing = False
         self.ads = self.settings.get("ads", False)
         self.play_music = self.settings.get("play_music", False)
         self.media_folder = self.settings.get("media_folder", "")
+        self.large_file_threshold = self.settings.get("large_file_threshold", 32 * 1024 * 1024)
+        self.damage = DamageTracker(self.settings.get("damage_tracking", True))
+        self.profiler = Profiler(self.settings.get("profiler", False))
+        self.governor = QualityGovernor(self.settings.get("frame_budget_ms", 1000 / 60), self.settings.get("adaptive_quality", True))
+        self.frame_index = 0
+        self.sim_time = 0.0
+        self.recovery_error: str = None
+        Popup.videos.max_bytes = self.settings.get("video_memory_budget", 64 * 1024 * 1024)
+        Popup.videos.cache = FrameCache(os.path.join(self.media_folder, ".cache"))
+
+        self.running = True
+        self.text_engine = None
+        self.filename = "Sans titre"
+        self.journal: EditJournal = None
+        self.startup = self._startup_steps()
+        if not deferred:
+            self.finish_startup()
 
+    def _startup_steps(self):
         font_name = self.settings.get("font", "")
-        if font_name not in pg.font.get_fonts():
-            print(f"La police '{font_name}' n'existe pas.\nPolices disponibles : {pg.font.get_fonts()}")
+        if not font_exists(font_name):
+            print(f"La police '{font_name}' n'existe pas.\nPolices disponibles : {available_fonts()}")
             sys.exit(-1)
+        yield "polices"
 
+        import numpy as np
+        from textengine import TextEngine
+        np.random.seed(self.seed)
         self.text_engine = TextEngine(self, font_name)
+        self.text_engine.profiler = self.profiler
+        self.text_engine.history.clock = lambda: self.sim_time
         self.text_engine.can_shake = self.settings.get("can_shake", False)
+        self.text_engine.effects.blur_radius = self.settings.get("blur_radius", 8)
+        self.text_engine.effects.blur_quality = self.settings.get("blur_quality", "medium")
+        self.text_engine.effects.noise_intensity = self.settings.get("noise_intensity", 100)
+        self.text_engine.effects.noise_fps = self.settings.get("noise_fps", 30)
+        self.text_engine.effects.noise_frames = max(1, self.settings.get("noise_frames", 8))
+        self.text_engine.effects.rotation_steps = self.settings.get("rotation_steps", 36)
 
         for effect in self.settings.get("effects", []):
             self.text_engine.add_effect(effect)
+        yield "moteur de texte"
 
-        self.running = True
         self.text_engine.background = self.settings.get("background", "")
         if self.text_engine.background:
             bg_path = os.path.join(self.media_folder, self.text_engine.background)
             self.text_engine.background_image = pg.image.load(bg_path)
             luminance = get_luminance(pg.transform.average_color(self.text_engine.background_image))
             color = (0, 0, 0) if luminance > 128 else (255, 255, 255)
-            self.text_engine.text_color = color
-            self.text_engine.cursor.color = color
+            self.text_engine.set_text_color(color)
+        yield "fond"
 
         videos_path = os.path.join(self.media_folder, "videos")
         self.videos = [f for f in os.listdir(videos_path) if f.endswith(".mp4")]
         self.popups: list[Popup] = []
-        threading.Thread(target=self._popups_thread, daemon=True).start()
+        self.popup_rects: list[pg.Rect] = []
+        pg.time.set_timer(POPUP_EVENT, 100)
+        yield "popups"
 
-        self.filename = "Sans titre"
+        self.saver = BackgroundSaver()
+        self.open_document()
+        if self.recovery_error:
+            print(self.recovery_error)
+        yield "journal"
 
         self.menus = Menu(self)
         self.resize(*self.screen_size, None)
+        yield "menus"
+
+    def advance_startup(self) -> bool:
+        if self.startup is None:
+            return False
+        start = time.perf_counter()
+        step = next(self.startup, None)
+        if step is None:
+            self.startup = None
+            return False
+        if self.verbose:
+            print(f"[démarrage] {step} : {(time.perf_counter() - start) * 1000:.1f} ms")
+        return True
 
-    def _popups_thread(self):
-        while self.running:
-            time.sleep(0.1)
-            if self.ads and len(self.popups) < 10 and random.randint(0, 300) == 69:
-                max_x = max(0, self.screen_size[0] - 300)
-                max_y = max(0, self.screen_size[1] - 300)
-                pos = (random.randint(0, max_x), random.randint(0, max_y))
-                video_path = os.path.join(self.media_folder, "videos", random.choice(self.videos))
-                self.popups.append(Popup(pos, (200, 200), self.screen_size, video_path))
-            elif not self.ads:
-                self.popups.clear()
+    def finish_startup(self):
+        while self.advance_startup():
+            pass
+
+    def schedule_popup(self):
+        if not self.ads:
+            self.close_popups()
+            return
+        roll = random.randint(0, 300)
+        pos = (random.randint(0, max(0, self.screen_size[0] - 300)), random.randint(0, max(0, self.screen_size[1] - 300)))
+        video = random.choice(self.videos) if self.videos else None
+        deterministic = self.recorder is not None or self.replaying
+        if not deterministic and self.clock.get_rawtime() > self.governor.budget_ms:
+            return
+        if len(self.popups) < 10 and video and roll == 69:
+            video_path = os.path.join(self.media_folder, "videos", video)
+            self.popups.append(Popup(pos, (200, 200), self.screen_size, video_path))
+
+    def close_popups(self):
+        for popup in self.popups[:]:
+            popup.close()
+        self.popups.clear()
+
+    def open_document(self, path: str = "") -> int:
+        filename = path or "Sans titre"
+        journal = EditJournal(filename, folder=self.journal_folder)
+        reopened = self.journal is not None and self.journal.path == journal.path
+        recovered = 0
+        self.recovery_error = None
+        try:
+            if not reopened and journal.has_recovery():
+                try:
+                    recovered = max(journal.replay(
+                        self.text_engine.buffer,
+                        lambda buffer, base_path: buffer.open_file(base_path, self.large_file_threshold)
+                    ), 1)
+                    self.text_engine.history.clear()
+                    self.text_engine.cursor.clamp()
+                except Exception as e:
+                    journal.set_aside()
+                    self.recovery_error = f"Récupération impossible ({e}), journal mis de côté en '{journal.path}.bad'"
+            if not recovered and path:
+                self.text_engine.open_file(path, self.large_file_threshold)
+        except Exception:
+            journal.close()
+            raise
+
+        if self.journal:
+            self.journal.close(discard=True)
+        self.journal = self.text_engine.journal = journal
+        self.filename = filename
+        if recovered:
+            journal.compact(self.text_engine.buffer)
+        else:
+            journal.start(BASE_FILE if path else BASE_EMPTY, os.path.abspath(path) if path else "")
+        return recovered
 
     def update(self, event: pg.event.Event):
         self.text_engine.update(event)
         for popup in self.popups[:]:
             popup.close_button.event(event, popup.pos)
             if popup.close_button.is_clicked:
+                popup.close()
                 self.popups.remove(popup)
 
     def toggle_music(self):
@@ -98,16 +212,40 @@ class Main:
         max_x = self.screen_size[0]
         max_y = self.screen_size[1]
 
-        for popup in self.popups:
-            x = min(max(popup.pos[0], 0), max_x - popup.size[0] - 100)
-            y = min(max(popup.pos[1], 0), max_y - popup.size[1] - 100)
-            popup.pos = (x, y)
-            self.window.blit(popup.draw(), popup.pos)
+        for rect in self.popup_rects:
+            self.damage.add(rect)
+        self.popup_rects = []
+
+        self.frame_index += 1
+        with self.profiler.stage("popups"):
+            if self.frame_index % self.governor.tier["popup_step"] == 0:
+                Popup.videos.tick()
+            for popup in self.popups:
+                x = min(max(popup.pos[0], 0), max_x - popup.size[0] - 100)
+                y = min(max(popup.pos[1], 0), max_y - popup.size[1] - 100)
+                popup.pos = (x, y)
+                popup.draw(self.window)
+                self.popup_rects.append(popup.rect)
+                self.damage.add(popup.rect)
+
+        if self.profiler.hud:
+            self.damage.add(self.profiler.draw_hud(self.window))
+
+    def export_trace(self) -> str:
+        path = time.strftime("trace-%Y%m%d-%H%M%S.json")
+        count = self.profiler.export(path)
+        print(f"Trace exportée : {path} ({count} évènements)")
+        return path
 
     def intro(self):
+        from pyvidplayer2 import Video
+
+        start = time.perf_counter()
         vid = Video(os.path.join(self.media_folder, "intro.mp4"))
         vid.resize(self.screen_size)
         vid.set_volume(1.0)
+        if self.verbose:
+            print(f"[démarrage] vidéo d'introduction : {(time.perf_counter() - start) * 1000:.1f} ms")
         while vid.active:
             for event in pg.event.get():
                 if event.type == pg.QUIT:
@@ -115,54 +253,126 @@ class Main:
                     sys.exit()
                 if event.type == pg.VIDEORESIZE:
                     self.resize(event.w, event.h, vid)
+            self.advance_startup()
             if vid.draw(self.window, (0, 0), force_draw=False):
                 pg.display.update()
+        self.finish_startup()
 
-    def resize(self, width: int, height: int, video: Video):
+    def resize(self, width: int, height: int, video=None):
         self.screen_size = [max(width, 300), max(height, 168)]
         self.window = pg.display.set_mode(self.screen_size, pg.RESIZABLE)
-        self.text_engine.screen = pg.Surface(self.screen_size)
-        self.text_engine.effects.canvas_size = self.screen_size
+        self.damage.invalidate()
         if video:
             video.resize(self.screen_size)
+        if self.text_engine is None:
+            return
+        self.text_engine.resize(self.screen_size)
         if self.text_engine.background:
             self.text_engine.background_image = pg.transform.smoothscale(self.text_engine.background_image, self.screen_size)
 
+    def record(self, path: str):
+        self.recorder = Recorder(path, self.seed, self.screen_size, self.settings, {POPUP_EVENT})
+        self.sim_time = 0.0
+        if self.text_engine is not None:
+            self.text_engine.effects.particles.clear()
+
+    def close(self, discard: bool = True):
+        self.running = False
+        if self.journal:
+            self.journal.close(discard=discard)
+            self.journal = None
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def handle_event(self, event: pg.event.Event):
+        if event.type == pg.QUIT:
+            self.running = False
+            return
+        if event.type == POPUP_EVENT:
+            self.schedule_popup()
+        if event.type == pg.VIDEORESIZE:
+            self.resize(event.w, event.h, None)
+        if event.type == pg.KEYDOWN:
+            ctrl = event.mod & pg.KMOD_CTRL
+            if event.key == pg.K_F3:
+                self.profiler.toggle_hud()
+                self.damage.invalidate()
+            elif event.key == pg.K_F4:
+                self.export_trace()
+            elif ctrl and event.key == pg.K_r:
+                self.text_engine.reset_view()
+            elif not self.replaying:
+                if event.key == pg.K_ESCAPE:
+                    self.menus.settings()
+                    self.damage.invalidate()
+                elif ctrl and event.key == pg.K_s:
+                    self.menus.save_interface()
+                    self.damage.invalidate()
+                elif ctrl and event.key == pg.K_o:
+                    self.menus.load_interface()
+                    self.damage.invalidate()
+        self.update(event)
+
+    def step(self, events: list[pg.event.Event], fps: int = 60):
+        deterministic = self.recorder is not None or self.replaying
+        self.sim_time = self.sim_time + 1 / 60 if deterministic else pg.time.get_ticks() / 1000
+        self.text_engine.effects.time = self.sim_time
+        self.profiler.begin_frame()
+        with self.profiler.stage("events"):
+            for event in events:
+                self.handle_event(event)
+                if not self.running:
+                    return
+
+        with self.profiler.stage("journal"):
+            self.journal.tick(self.text_engine.buffer)
+        self.toggle_music()
+        self.draw()
+        with self.profiler.stage("present"):
+            self.damage.present()
+        self.profiler.end_frame()
+        if self.verbose and not self.first_frame:
+            self.first_frame = True
+            print(f"[démarrage] première image éditable après {(time.perf_counter() - self.launched) * 1000:.1f} ms")
+        self.clock.tick(fps)
+        if not deterministic and self.governor.update(self.clock.get_rawtime()):
+            self.text_engine.effects.set_quality(self.governor.tier)
+        caption = "NotePad-- | " + self.filename + f" | FPS : {round(self.clock.get_fps(), 2)} | {self.governor.status()}"
+        if self.text_engine.buffer.source is not None:
+            caption += f" | Indexation : {round(self.text_engine.buffer.loading_progress() * 100)}%"
+        if self.saver.busy:
+            caption += " | " + self.saver.status()
+        pg.display.set_caption(caption)
+
     def run(self):
         try:
             self.intro()
             self.toggle_music()
             while self.running:
-                for event in pg.event.get():
-                    if event.type == pg.QUIT:
-                        self.running = False
-                        sys.exit()
-                    if event.type == pg.VIDEORESIZE:
-                        self.resize(event.w, event.h, None)
-                    if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
-                        self.menus.settings()
-                    self.update(event)
-
-                keys = pg.key.get_pressed()
-                ctrl = keys[pg.K_LCTRL] or keys[pg.K_RCTRL]
-
-                if ctrl and keys[pg.K_r]:
-                    self.text_engine.reset_view()
-                if ctrl and keys[pg.K_s]:
-                    self.menus.save_interface()
-                if ctrl and keys[pg.K_o]:
-                    self.menus.load_interface()
-
-                self.toggle_music()
-                self.draw()
-                pg.display.flip()
-                self.clock.tick(60)
-                pg.display.set_caption("NotePad-- | " + self.filename + f" | FPS : {round(self.clock.get_fps(), 2)}")
+                events = pg.event.get()
+                if self.recorder:
+                    events = self.recorder.capture(events)
+                self.step(events)
+            self.close(discard=True)
+            sys.exit()
 
         except KeyboardInterrupt:
-            self.running = False
+            self.close(discard=False)
+
+def launch(record: str = None, verbose: bool = False, launched: float = None):
+    launched = time.perf_counter() if launched is None else launched
+    pg.init()
+    pg.key.set_repeat(300, 30)
+    app = Main((1200, 800), deferred=True, verbose=verbose, launched=launched)
+    if verbose:
+        print(f"[démarrage] fenêtre prête après {(time.perf_counter() - launched) * 1000:.1f} ms")
+    if record:
+        app.record(record)
+    app.run()
 
-pg.init()
-pg.key.set_repeat(300, 30)
-main = Main((1200, 800))
-main.run()
\ No newline at end of file
+if __name__ == "__main__":
+    launch(
+        sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv[:-1] else None,
+        "--verbose" in sys.argv
+    )
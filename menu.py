@@ -3,6 +3,7 @@ import sys
 import os
 import json
 from ui import TextZone, Button, CheckBox
+from fontcache import font_exists
 
 def get_luminance(color: pg.Color) -> float:
     r, g, b = color[:3]
@@ -51,14 +52,22 @@ class Menu:
             if save_button.is_clicked:
                 filename = text_zone.get()
 
-                try:
-                    with open(filename, "w", encoding="utf-8") as f:
-                        f.write(self.main.text_engine.text)
-                    message = f"Sauvegardé dans '{filename}'"
-                except Exception as e:
-                    message = f"Erreur : {e}"
+                if self.main.saver.busy:
+                    message = "Une sauvegarde est déjà en cours"
+                else:
+                    journal = self.main.journal
+                    checkpoint = journal.mark()
+
+                    def on_done(saver):
+                        if saver.error is None:
+                            journal.rebase(checkpoint, saver.filename)
+
+                    self.main.saver.save(self.main.text_engine.buffer, filename, on_done)
+                    message = ""
                 save_button.is_clicked = False
 
+            message = self.main.saver.status() or message
+
             if cancel_button.is_clicked:
                 running = False
 
@@ -97,10 +106,14 @@ class Menu:
                 filename = text_zone.get()
 
                 try:
-                    with open(filename, "r", encoding="utf-8") as f:
-                        self.main.text_engine.text = f.read()
-                    message = f"Fichier '{filename}' chargé !"
-                    self.main.filename = filename
+                    if self.main.open_document(filename):
+                        message = f"Fichier '{filename}' récupéré après un arrêt brutal !"
+                    elif self.main.recovery_error:
+                        message = f"{self.main.recovery_error}. Fichier '{filename}' chargé."
+                    elif os.path.getsize(filename) >= self.main.large_file_threshold:
+                        message = f"Fichier '{filename}' chargé (mode gros fichier) !"
+                    else:
+                        message = f"Fichier '{filename}' chargé !"
                 except Exception as e:
                     message = f"Erreur : {e}"
                 load_button.is_clicked = False
@@ -180,9 +193,7 @@ class Menu:
 
                 font_name = font_zone.get().lower()
                 background_file = background_zone.get()
-                font_exists = font_name in pg.font.get_fonts()
-
-                if not font_exists:
+                if not font_exists(font_name):
                     error_message += f"Police invalide : '{font_name}'.\n"
                     valid = False
 
@@ -207,9 +218,7 @@ class Menu:
                         else:
                             self.main.text_engine.remove_effect(effect)
 
-                    self.main.text_engine.font = pg.font.SysFont(font_name, self.main.text_engine.font_size)
-                    self.main.text_engine.font.set_bold(True)
-                    self.main.text_engine.font_name = font_name
+                    self.main.text_engine.set_font(font_name)
 
                     if background_file:
                         self.main.text_engine.background = background_file
@@ -223,8 +232,7 @@ class Menu:
                         self.main.text_engine.background = None
                         color = (255, 255, 255)
 
-                    self.main.text_engine.text_color = color
-                    self.main.text_engine.cursor.color = color
+                    self.main.text_engine.set_text_color(color)
 
                     self.main.settings.update({
                         "play_music": self.main.play_music,
@@ -0,0 +1,92 @@
+import numpy as np
+import pygame as pg
+
+STEP = 1 / 60
+MAX_STEPS = 8
+
+
+class ParticleSystem:
+    def __init__(self, capacity: int = 4096, spawn_rate: float = 20.0, max_radius: int = 15):
+        self.capacity = capacity
+        self.limit = capacity
+        self.spawn_rate = spawn_rate
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.lifespan = np.zeros(capacity, dtype=np.float32)
+        self.sprites = [self._bake(radius) for radius in range(max_radius + 1)]
+        self.last_time = None
+        self.accumulator = 0.0
+        self.pending_spawn = 0.0
+
+    @staticmethod
+    def _bake(radius: int) -> pg.Surface:
+        glow_radius = radius * 2
+        sprite = pg.Surface((glow_radius * 2 + 1, glow_radius * 2 + 1), 0, 32)
+        sprite.fill((0, 0, 0))
+        if radius:
+            pg.draw.circle(sprite, (20, 20, 60), (glow_radius, glow_radius), glow_radius)
+            pg.draw.circle(sprite, (255, 255, 255), (glow_radius, glow_radius), radius)
+        return sprite
+
+    def clear(self):
+        self.count = 0
+        self.last_time = None
+        self.accumulator = 0.0
+        self.pending_spawn = 0.0
+
+    def spawn(self, amount: int, size: tuple[int, int]):
+        amount = min(amount, self.limit - self.count)
+        if amount <= 0:
+            return
+        width, height = size
+        new = slice(self.count, self.count + amount)
+        self.position[new, 0] = np.random.uniform(20, max(20, width - 20), amount)
+        self.position[new, 1] = np.random.uniform(20, max(20, height - 20), amount)
+        self.velocity[new, 0] = np.random.uniform(-1.0, 1.0, amount)
+        self.velocity[new, 1] = np.random.uniform(-1.0, -0.5, amount)
+        self.size[new] = np.random.randint(4, len(self.sprites), amount)
+        self.lifespan[new] = np.random.uniform(1.0, 3.0, amount)
+        self.count += amount
+
+    def step(self, size: tuple[int, int]):
+        self.pending_spawn += self.spawn_rate * STEP
+        if self.pending_spawn >= 1:
+            amount = int(self.pending_spawn)
+            self.pending_spawn -= amount
+            self.spawn(amount, size)
+
+        n = self.count
+        self.position[:n] += self.velocity[:n]
+        self.velocity[:n, 1] += 0.01
+        self.size[:n] -= 0.1
+        self.lifespan[:n] -= STEP / 2
+
+        alive = (self.size[:n] > 0) & (self.lifespan[:n] > 0)
+        survivors = int(np.count_nonzero(alive))
+        if survivors != n:
+            for array in (self.position, self.velocity, self.size, self.lifespan):
+                array[:survivors] = array[:n][alive]
+            self.count = survivors
+
+    def update(self, canvas: pg.Surface, now: float):
+        if self.last_time is None:
+            self.last_time = now - STEP
+        self.accumulator = min(self.accumulator + now - self.last_time, STEP * MAX_STEPS)
+        self.last_time = now
+
+        size = canvas.get_size()
+        while self.accumulator >= STEP:
+            self.step(size)
+            self.accumulator -= STEP
+        self.draw(canvas)
+
+    def draw(self, canvas: pg.Surface):
+        n = self.count
+        if not n:
+            return
+        radius = np.minimum(self.size[:n].astype(np.intp), len(self.sprites) - 1)
+        corner = self.position[:n].astype(np.intp) - (radius * 2)[:, None]
+        sprites = self.sprites
+        canvas.blits([(sprites[r], (x, y), None, pg.BLEND_RGB_ADD) for r, (x, y) in zip(radius.tolist(), corner.tolist()) if r], False)
@@ -1,9 +1,9 @@
 import pygame as pg
-import imageio.v3 as iio
 from ui import Button
+from videostream import VideoLibrary, VideoStream
 
 class Popup:
-    _video_cache: dict[str, list[pg.Surface]] = {}
+    videos = VideoLibrary()
 
     def __init__(self, pos: tuple[int, int], size: tuple[int, int], screen_size: tuple[int], video_path: str):
         self.pos = pos
@@ -11,37 +11,23 @@ class Popup:
         self.screen_size = screen_size
         self.close_button = Button("X", (50, 50), 50, (self.size[0] + 50, 50))
 
-        self.frames = self._load_video_frames(video_path, self.size)
-        self.frame_counter = 0
+        self.stream: VideoStream = self.videos.acquire(video_path, self.size)
 
-    @classmethod
-    def _load_video_frames(cls, path: str, target_size: tuple[int, int]) -> list[pg.Surface]:
-        if path in cls._video_cache:
-            return cls._video_cache[path]
-
-        frames = []
-        for frame in iio.imiter(path):
-            height, width = frame.shape[:2]
-            frame = frame.astype('uint8')
-
-            mode = 'RGB' if frame.shape[2] == 3 else 'RGBA'
-            surface = pg.image.frombuffer(frame.tobytes(), (width, height), mode).convert_alpha()
-            surface = pg.transform.scale(surface, target_size).convert()
-            frames.append(surface)
-
-        cls._video_cache[path] = frames
-        return frames
-
-    def draw(self) -> pg.Surface:
-        current_frame = self.frames[self.frame_counter]
-        self.frame_counter = (self.frame_counter + 1) % len(self.frames)
+    def close(self):
+        if self.stream:
+            self.videos.release(self.stream)
+            self.stream = None
 
+    @property
+    def rect(self) -> pg.Rect:
         margin = 50
-        canvas_size = (self.size[0] + 2 * margin, self.size[1] + 2 * margin)
-        canvas = pg.Surface(canvas_size, pg.SRCALPHA)
-        canvas.fill((0, 0, 0, 0))
-
-        canvas.blit(current_frame, (margin, margin))
-        self.close_button.draw(canvas, self.pos)
+        return pg.Rect(self.pos, (self.size[0] + 2 * margin, self.size[1] + 2 * margin))
 
-        return canvas
+    def draw(self, window: pg.Surface):
+        margin = 50
+        frame_pos = (self.pos[0] + margin, self.pos[1] + margin)
+        if self.stream and self.stream.current is not None:
+            window.blit(self.stream.current, frame_pos)
+        else:
+            window.fill((0, 0, 0), (frame_pos, self.size))
+        self.close_button.draw(window, self.pos)
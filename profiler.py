@@ -0,0 +1,119 @@
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+import pygame as pg
+
+NO_STAGE = nullcontext()
+
+
+class Stage:
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled: bool = False, history: int = 240, max_events: int = 200_000):
+        self.enabled = enabled
+        self.recording = enabled
+        self.hud = False
+        self.history = history
+        self.stages: dict[str, Stage] = {}
+        self.samples: dict[str, deque[float]] = {}
+        self.current: dict[str, float] = {}
+        self.events: deque[tuple] = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+        self.frame_start = None
+        self.font = None
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return NO_STAGE
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage(self, name)
+        return stage
+
+    def record(self, name: str, start: float, end: float):
+        self.current[name] = self.current.get(name, 0.0) + (end - start) * 1000
+        self.events.append((name, start, end))
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        self.record("frame", self.frame_start, time.perf_counter())
+        for name, value in self.current.items():
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.history)
+            self.samples[name].append(value)
+        self.current.clear()
+        self.frame_start = None
+
+    def toggle_hud(self):
+        self.hud = not self.hud
+        self.enabled = self.hud or self.recording
+
+    def stats(self) -> dict[str, tuple[float, float, float]]:
+        stats = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            stats[name] = (
+                ordered[len(ordered) // 2],
+                ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                ordered[-1]
+            )
+        return stats
+
+    def draw_hud(self, window: pg.Surface) -> pg.Rect:
+        if self.font is None:
+            self.font = pg.font.Font(None, 20)
+        stats = self.stats()
+        names = ["frame"] + sorted(name for name in stats if name != "frame")
+        rows = [("étape", "p50", "p95", "max")]
+        rows += [(name, *(f"{value:.2f}" for value in stats[name])) for name in names if name in stats]
+
+        line_height = self.font.get_linesize()
+        column = 60
+        name_width = max(self.font.size(row[0])[0] for row in rows) + 10
+        rect = pg.Rect(10, 10, name_width + 3 * column + 20, line_height * len(rows) + 20)
+        panel = pg.Surface(rect.size)
+        panel.set_alpha(200)
+        window.blit(panel, rect)
+
+        for i, row in enumerate(rows):
+            y = rect.y + 10 + i * line_height
+            window.blit(self.font.render(row[0], True, (0, 255, 0)), (rect.x + 10, y))
+            for j, value in enumerate(row[1:], 1):
+                text = self.font.render(value, True, (0, 255, 0))
+                window.blit(text, (rect.x + 10 + name_width + j * column - text.get_width(), y))
+        return rect
+
+    def export(self, path: str) -> int:
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1_000_000,
+                "dur": (end - start) * 1_000_000,
+                "pid": 0,
+                "tid": 0
+            }
+            for name, start, end in list(self.events)
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
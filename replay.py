@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import pygame as pg
+
+RECORDED_EVENTS = {
+    pg.KEYDOWN, pg.KEYUP, pg.TEXTINPUT,
+    pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP, pg.MOUSEMOTION, pg.MOUSEWHEEL,
+    pg.VIDEORESIZE, pg.QUIT
+}
+
+
+def encode_event(event: pg.event.Event) -> dict:
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, (bool, int, float, str)):
+            attributes[name] = value
+        elif isinstance(value, tuple) and all(isinstance(item, (int, float)) for item in value):
+            attributes[name] = list(value)
+    return {"type": event.type, "attributes": attributes}
+
+
+def decode_event(record: dict) -> pg.event.Event:
+    attributes = {name: tuple(value) if isinstance(value, list) else value for name, value in record["attributes"].items()}
+    return pg.event.Event(record["type"], attributes)
+
+
+class Recorder:
+    def __init__(self, path: str, seed: int, screen_size: tuple[int, int], settings: dict, extra_events: set = ()):
+        self.file = open(path, "w", encoding="utf-8")
+        self.event_types = RECORDED_EVENTS | set(extra_events)
+        self.start = time.perf_counter()
+        self.frame = 0
+        self._write({"version": 1, "seed": seed, "screen_size": list(screen_size), "settings": settings})
+
+    def _write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def capture(self, events: list[pg.event.Event]) -> list[pg.event.Event]:
+        captured = []
+        elapsed = (time.perf_counter() - self.start) * 1000
+        for event in events:
+            if event.type == pg.KEYDOWN and event.key == pg.K_v and event.mod & pg.KMOD_CTRL:
+                import pyperclip
+                event = pg.event.Event(event.type, {**event.dict, "clipboard": pyperclip.paste()})
+            if event.type in self.event_types:
+                self._write({"frame": self.frame, "t": elapsed, **encode_event(event)})
+            captured.append(event)
+        self.frame += 1
+        return captured
+
+    def close(self):
+        self._write({"end": self.frame, "t": (time.perf_counter() - self.start) * 1000})
+        self.file.close()
+
+
+def load(path: str) -> tuple[dict, list[list[pg.event.Event]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        records = [json.loads(line) for line in f if line.strip()]
+
+    frame_count = max((record.get("end", record.get("frame", 0) + 1) for record in records), default=0)
+    frames = [[] for _ in range(frame_count)]
+    for record in records:
+        if "type" in record:
+            frames[record["frame"]].append(decode_event(record))
+    return header, frames
+
+
+def frame_stats(durations: list[float]) -> dict:
+    if not durations:
+        return {"frames": 0}
+    ordered = sorted(durations)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return {
+        "frames": len(ordered),
+        "total_s": sum(ordered) / 1000,
+        "mean_ms": sum(ordered) / len(ordered),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1]
+    }
+
+
+def replay(path: str, realtime: bool = False) -> dict:
+    from main import Main, POPUP_EVENT
+
+    header, frames = load(path)
+    pg.init()
+    with tempfile.TemporaryDirectory() as journal_folder:
+        width, height = header["screen_size"]
+        app = Main((width - 20, height - 20), seed=header["seed"], settings=header["settings"], journal_folder=journal_folder)
+        app.replaying = True
+        pg.time.set_timer(POPUP_EVENT, 0)
+
+        durations = []
+        for events in frames:
+            pg.event.pump()
+            start = time.perf_counter()
+            app.step(events, 60 if realtime else 0)
+            durations.append((time.perf_counter() - start) * 1000)
+            if not app.running:
+                break
+        app.close()
+    pg.quit()
+    return frame_stats(durations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejoue une session enregistrée avec main.py --record")
+    parser.add_argument("trace", help="fichier de session (.jsonl)")
+    parser.add_argument("--realtime", action="store_true", help="rejoue à 60 images par seconde au lieu du plus vite possible")
+    parser.add_argument("--window", action="store_true", help="affiche la fenêtre au lieu du pilote vidéo factice")
+    args = parser.parse_args()
+    if not args.window:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    print(json.dumps(replay(args.trace, args.realtime), indent=4))
+    sys.exit(0)
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import threading
+from textbuffer import TextBuffer
+
+
+class BackgroundSaver:
+    def __init__(self):
+        self.thread: threading.Thread = None
+        self.filename = ""
+        self.progress = 0.0
+        self.error: Exception = None
+        self.done = False
+        self.on_done = None
+
+    @property
+    def busy(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def save(self, buffer: TextBuffer, filename: str, on_done=None) -> bool:
+        if self.busy:
+            return False
+        blocks = buffer.snapshot()
+        self.filename = filename
+        self.progress = 0.0
+        self.error = None
+        self.done = False
+        self.on_done = on_done
+        self.thread = threading.Thread(target=self._write, args=(blocks, filename))
+        self.thread.start()
+        return True
+
+    def _write(self, blocks: list, filename: str):
+        target = os.path.abspath(filename)
+        directory = os.path.dirname(target)
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix="." + os.path.basename(target) + ".", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for i, chunk in enumerate(TextBuffer.iter_chunks(blocks), 1):
+                    f.write(chunk)
+                    self.progress = i / len(blocks)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if os.path.exists(target):
+                shutil.copymode(target, temp_path)
+            else:
+                os.chmod(temp_path, 0o644)
+            os.replace(temp_path, target)
+            self._sync_directory(directory)
+        except Exception as e:
+            self.error = e
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            self.done = True
+            if self.on_done:
+                self.on_done(self)
+
+    @staticmethod
+    def _sync_directory(directory: str):
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def status(self) -> str:
+        if self.busy:
+            return f"Sauvegarde de '{self.filename}' : {round(self.progress * 100)}%"
+        if self.error:
+            return f"Erreur : {self.error}"
+        if self.done:
+            return f"Sauvegardé dans '{self.filename}'"
+        return ""
@@ -1,3 +1,7 @@
+import time
+STARTED = time.perf_counter()
+
+import importlib.util
 import subprocess
 import sys
 import shutil
@@ -104,17 +108,12 @@ def install_python_packages():
 
 def check_modules():
     required_modules = ["pygame", "pyvidplayer2", "imageio_ffmpeg"]
-    missing = []
-    for module in required_modules:
-        try:
-            __import__(module)
-        except ImportError:
-            missing.append(module)
-    return missing
+    return [module for module in required_modules if importlib.util.find_spec(module) is None]
 
 def launch_main():
     print_info("Launching main.py")
     import main
+    main.launch(verbose="--verbose" in sys.argv, launched=STARTED)
 
 if __name__ == "__main__":
     missing_modules = check_modules()
@@ -0,0 +1,230 @@
+import os
+from itertools import islice
+from largefile import MappedBlock, MappedFile
+
+BLOCK_SIZE = 256
+MAPPED_BLOCK_SIZE = 4096
+
+
+class LineIndex:
+    def __init__(self, counts: list[int]):
+        self.size = len(counts)
+        self.tree = [0] * (self.size + 1)
+        for i, count in enumerate(counts, 1):
+            self.tree[i] += count
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, block: int, delta: int):
+        i = block + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, block: int) -> int:
+        total = 0
+        i = block
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, line: int) -> tuple[int, int]:
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= line:
+                pos = nxt
+                line -= self.tree[nxt]
+            step >>= 1
+        return pos, line
+
+    def append(self, count: int):
+        self.size += 1
+        i = self.size
+        self.tree.append(count + self.prefix(i - 1) - self.prefix(i - (i & -i)))
+
+
+class TextBuffer:
+    def __init__(self, text: str = ""):
+        self.listeners = []
+        self.source: MappedFile = None
+        self._mapped = 0
+        self._shared: set[int] = set()
+        self._blocks: list[list[str] | MappedBlock] = [[""]]
+        self._count = 1
+        self._index = LineIndex([1])
+        self.set_text(text)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _notify(self, y: int, removed: int, added: int, span: tuple[int, int] = None):
+        for listener in self.listeners:
+            listener(y, removed, added, span)
+
+    @staticmethod
+    def _chunk(lines: list[str]) -> list[list[str]]:
+        return [lines[i:i + BLOCK_SIZE] for i in range(0, len(lines), BLOCK_SIZE)]
+
+    def _reindex(self):
+        self._index = LineIndex([len(block) for block in self._blocks])
+
+    def _locate(self, y: int) -> tuple[int, int]:
+        if not 0 <= y < self._count:
+            raise IndexError(f"Ligne {y} hors du texte ({self._count} lignes)")
+        return self._index.find(y)
+
+    def set_text(self, text: str):
+        removed = self._count
+        self.source = None
+        self._blocks = self._chunk(text.split('\n'))
+        self._count = sum(len(block) for block in self._blocks)
+        self._reindex()
+        self._notify(0, removed, self._count)
+
+    def load_mapped(self, source: MappedFile):
+        removed = self._count
+        self.source = source
+        self._mapped = 0
+        self._blocks = []
+        self._count = 0
+        self._index = LineIndex([])
+        self._append_mapped()
+        self._notify(0, removed, self._count)
+
+    def open_file(self, path: str, large_file_threshold: int) -> bool:
+        if os.path.getsize(path) >= large_file_threshold:
+            self.load_mapped(MappedFile(path))
+            return True
+        with open(path, "r", encoding="utf-8") as f:
+            self.set_text(f.read())
+        return False
+
+    def adopt(self, other: "TextBuffer"):
+        removed = self._count
+        self.source = other.source
+        self._mapped = other._mapped
+        self._shared = set()
+        self._blocks = other._blocks
+        self._count = other._count
+        self._index = other._index
+        self._notify(0, removed, self._count)
+
+    def _append_mapped(self):
+        done = self.source.done
+        available = self.source.line_count()
+        while self._mapped < available:
+            count = min(MAPPED_BLOCK_SIZE, available - self._mapped)
+            self._blocks.append(MappedBlock(self.source, self._mapped, count))
+            self._index.append(count)
+            self._mapped += count
+            self._count += count
+        if done:
+            self.source = None
+
+    def poll(self):
+        if self.source is None:
+            return
+        old_count = self._count
+        self._append_mapped()
+        if self._count != old_count:
+            self._notify(old_count, 0, self._count - old_count)
+
+    def finish_loading(self):
+        if self.source is not None:
+            self.source.thread.join()
+            self.poll()
+
+    def loading_progress(self) -> float:
+        return 1.0 if self.source is None else self.source.progress()
+
+    @staticmethod
+    def _block_text(block: list[str] | MappedBlock) -> str:
+        return block.text() if isinstance(block, MappedBlock) else '\n'.join(block)
+
+    def get_text(self) -> str:
+        self.finish_loading()
+        return '\n'.join(map(self._block_text, self._blocks))
+
+    def snapshot(self) -> list[list[str] | MappedBlock]:
+        self.finish_loading()
+        self._shared = {id(block) for block in self._blocks if isinstance(block, list)}
+        return list(self._blocks)
+
+    @classmethod
+    def iter_chunks(cls, blocks: list[list[str] | MappedBlock]):
+        for i, block in enumerate(blocks):
+            yield ('\n' if i else '') + cls._block_text(block)
+
+    def line(self, y: int) -> str:
+        block, offset = self._locate(y)
+        return self._blocks[block][offset]
+
+    def line_length(self, y: int) -> int:
+        return len(self.line(y))
+
+    def lines(self, start: int = 0, end: int = None):
+        end = self._count if end is None else min(end, self._count)
+        if start >= end:
+            return
+        block, offset = self._locate(start)
+        remaining = end - start
+        for lines in islice(self._blocks, block, None):
+            for i in range(offset, min(len(lines), offset + remaining)):
+                yield lines[i]
+                remaining -= 1
+            if not remaining:
+                return
+            offset = 0
+
+    def _replace(self, y0: int, y1: int, new_lines: list[str], span: tuple[int, int] = None):
+        first, first_offset = self._locate(y0)
+        last, last_offset = self._locate(y1 - 1)
+        delta = len(new_lines) - (y1 - y0)
+
+        if first == last:
+            block = self._blocks[first]
+            if isinstance(block, MappedBlock) or id(block) in self._shared:
+                self._shared.discard(id(block))
+                block = self._blocks[first] = list(block)
+            block[first_offset:last_offset + 1] = new_lines
+            if not block or len(block) > 2 * BLOCK_SIZE:
+                self._blocks[first:first + 1] = self._chunk(block)
+                self._reindex()
+            elif delta:
+                self._index.add(first, delta)
+        else:
+            merged = self._blocks[first][:first_offset] + new_lines + self._blocks[last][last_offset + 1:]
+            self._blocks[first:last + 1] = self._chunk(merged)
+            self._reindex()
+
+        self._count += delta
+        self._notify(y0, y1 - y0, len(new_lines), span)
+
+    def insert(self, y: int, x: int, text: str) -> tuple[int, int]:
+        line = self.line(y)
+        head, tail = line[:x], line[x:]
+        parts = text.split('\n')
+        if len(parts) == 1:
+            self._replace(y, y + 1, [head + text + tail], (x, len(tail)))
+            return y, x + len(text)
+
+        parts[0] = head + parts[0]
+        end_x = len(parts[-1])
+        parts[-1] += tail
+        self._replace(y, y + 1, parts, (x, 0))
+        return y + len(parts) - 1, end_x
+
+    def delete(self, y: int, x: int, end_y: int, end_x: int) -> str:
+        if end_y == y:
+            line = self.line(y)
+            self._replace(y, y + 1, [line[:x] + line[end_x:]], (x, len(line) - end_x))
+            return line[x:end_x]
+
+        lines = list(self.lines(y, end_y + 1))
+        removed = '\n'.join([lines[0][x:], *lines[1:-1], lines[-1][:end_x]])
+        self._replace(y, end_y + 1, [lines[0][:x] + lines[-1][end_x:]], (x, 0))
+        return removed
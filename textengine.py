@@ -1,8 +1,15 @@
 import pygame as pg
 import string
-import pyperclip
 import random
-from effects import Effects
+from effects import Effects, PostProcessor
+from textbuffer import TextBuffer
+from largefile import MappedFile
+from journal import EditJournal
+from profiler import Profiler
+from history import EditHistory, end_of
+from glyphcache import GlyphAtlas
+from linemetrics import LineMetrics
+from linesurfaces import LineSurfaceCache
 
 class Cursor:
     def __init__(self, text_engine: 'TextEngine'):
@@ -12,83 +19,74 @@ class Cursor:
         self.visible = True
         self.blink_timer = 0
         self.color = (255, 255, 255)
+        self.rect = pg.Rect(0, 0, 0, 0)
 
     def update(self, event: pg.event.Event):
-        lines = self.text_engine.get_lines()
+        buffer = self.text_engine.buffer
 
         if event.type != pg.KEYDOWN:
             return
 
         if event.key == pg.K_UP and self.y > 0:
             self.y -= 1
-        elif event.key == pg.K_DOWN and self.y < len(lines) - 1:
+        elif event.key == pg.K_DOWN and self.y < len(buffer) - 1:
             self.y += 1
         elif event.key == pg.K_LEFT:
             if self.x > 0:
                 self.x -= 1
             elif self.y > 0:
                 self.y -= 1
-                self.x = len(lines[self.y])
+                self.x = buffer.line_length(self.y)
         elif event.key == pg.K_RIGHT:
-            if self.x < len(lines[self.y]):
+            if self.x < buffer.line_length(self.y):
                 self.x += 1
-            elif self.y < len(lines) - 1:
+            elif self.y < len(buffer) - 1:
                 self.y += 1
                 self.x = 0
 
-        self.x = min(self.x, len(lines[self.y]))
+        self.x = min(self.x, buffer.line_length(self.y))
+
+    def insert_text(self, text: str):
+        self.y, self.x = self.text_engine.insert_at(self.y, self.x, text)
 
     def insert_char(self, char: str):
-        lines = self.text_engine.get_lines()
-        line = lines[self.y]
-        lines[self.y] = line[:self.x] + char + line[self.x:]
-        self.text_engine.set_text('\n'.join(lines))
-        self.x += 1
+        self.insert_text(char)
 
     def backspace(self):
-        lines = self.text_engine.get_lines()
         if self.x > 0:
-            line = lines[self.y]
-            lines[self.y] = line[:self.x - 1] + line[self.x:]
+            self.text_engine.delete_range(self.y, self.x - 1, self.y, self.x)
             self.x -= 1
         elif self.y > 0:
-            previous_len = len(lines[self.y - 1])
-            lines[self.y - 1] += lines[self.y]
-            del lines[self.y]
+            previous_len = self.text_engine.buffer.line_length(self.y - 1)
+            self.text_engine.delete_range(self.y - 1, previous_len, self.y, 0)
             self.y -= 1
             self.x = previous_len
-        self.text_engine.set_text('\n'.join(lines))
 
     def return_key(self):
-        lines = self.text_engine.get_lines()
-        before, after = lines[self.y][:self.x], lines[self.y][self.x:]
-        lines[self.y] = before
-        lines.insert(self.y + 1, after)
-        self.text_engine.set_text('\n'.join(lines))
-        self.y += 1
-        self.x = 0
+        self.insert_text('\n')
+
+    def clamp(self):
+        buffer = self.text_engine.buffer
+        self.y = min(self.y, len(buffer) - 1)
+        self.x = min(self.x, buffer.line_length(self.y))
 
-    def draw(self, surface: pg.Surface, font: pg.font.Font, font_size: int):
-        lines = self.text_engine.get_lines()
-        if self.y >= len(lines):
+    def draw(self, surface: pg.Surface):
+        buffer = self.text_engine.buffer
+        font_size = self.text_engine.font_size
+        if self.y >= len(buffer):
             return
 
         self.blink_timer = (self.blink_timer + 1) % 20
         self.visible = self.blink_timer < 10
 
-        if not self.visible:
-            return
-
-        cursor_x = self.text_engine.view[0]
-        line = lines[self.y]
-
-        for i in range(self.x):
-            char_surface = font.render(line[i], True, (255, 255, 255))
-            cursor_x += char_surface.get_width()
-
+        cursor_x = self.text_engine.view[0] + self.text_engine.metrics.x_at(self.y, self.x)
         cursor_y = self.text_engine.view[1] + self.y * font_size
+        rect = pg.Rect(cursor_x, cursor_y, 2, font_size)
+        self.text_engine.add_damage(rect.union(self.rect))
+        self.rect = rect
 
-        pg.draw.rect(surface, self.color, (cursor_x, cursor_y, 2, font_size))
+        if self.visible:
+            pg.draw.rect(surface, self.color, rect)
 
 
 
@@ -97,19 +95,28 @@ class TextEngine:
         self.main = main
         self.font_name = font_name
         self.font_size = 36
-        self.font = pg.font.SysFont(font_name, self.font_size)
-        self.font.set_bold(True)
-
-        self.screen = pg.Surface(self.main.screen_size)
-        self.text = ""
+        self.text_color = (255, 255, 255)
+        self.glyphs = GlyphAtlas(font_name, self.font_size, self.text_color)
+        self.font = self.glyphs.font
+
+        self.post = PostProcessor(self.main.screen_size)
+        self.buffer = TextBuffer()
+        self.journal: EditJournal = None
+        self.profiler = Profiler()
+        self.history = EditHistory()
+        self.metrics = LineMetrics(self.buffer, self.glyphs)
+        self.line_surfaces = LineSurfaceCache(self.buffer, self.glyphs, self.metrics)
+        self.buffer.listeners.append(self._damage_lines)
+        self.scene = None
         self.view = [10.0, 10.0]
         self.cursor = Cursor(self)
-        self.text_color = (255, 255, 255)
 
         self.effects = Effects(self.screen.get_size(), 60)
         self.active_effects = []
         self.can_shake = False
         self.shake_timer = 0
+        self.frame_index = 0
+        self.last_offset = (0, 0)
 
         self.background = None
         self.background_image = None
@@ -121,6 +128,14 @@ class TextEngine:
         self.explosion_sound = pg.mixer.Sound(self.main.media_folder + "explosion.wav")
         self.explosion_sound.set_volume(0.5)
 
+    @property
+    def screen(self) -> pg.Surface:
+        return self.post.front
+
+    def resize(self, size: tuple[int, int]):
+        self.post.resize(size)
+        self.effects.resize(size)
+
     def add_effect(self, effect: str):
         if effect not in self.effects.available_effects:
             raise ValueError(f"L'effet '{effect}' n'existe pas.")
@@ -138,34 +153,72 @@ class TextEngine:
         self.cursor.x = 0
         self.cursor.y = 0
 
+    def set_font(self, font_name: str = None, font_size: int = None):
+        self.font_name = font_name or self.font_name
+        self.font_size = font_size or self.font_size
+        self.glyphs.configure(self.font_name, self.font_size, self.text_color)
+        self.font = self.glyphs.font
+
+    def set_text_color(self, color: tuple[int, int, int]):
+        self.text_color = color
+        self.cursor.color = color
+        self.glyphs.configure(self.font_name, self.font_size, self.text_color)
+
+    def add_damage(self, rect: pg.Rect):
+        if not any(effect in self.effects.animated_effects for effect in self.active_effects):
+            if not self.active_effects:
+                self.main.damage.add(rect)
+                return
+            for damaged in self.effects.damage_rects(rect, self.active_effects):
+                self.main.damage.add(damaged)
+
+    def _damage_lines(self, y: int, removed: int, added: int, span: tuple[int, int] = None):
+        line_height = max(self.font_size, self.glyphs.font.get_height())
+        top = self.view[1] + y * self.font_size
+        if removed == added:
+            height = (added - 1) * self.font_size + line_height
+        else:
+            height = self.screen.get_height() - top
+        self.add_damage((0, top, self.screen.get_width(), height))
+
     def has_effect(self, effect: str) -> bool:
         return effect in self.active_effects
 
     def handle_inputs(self, event: pg.event.Event):
         if event.type == pg.KEYDOWN:
-            keys = pg.key.get_pressed()
+            ctrl = event.mod & pg.KMOD_CTRL
 
             if self.can_shake:
                 self.add_effect("shake")
                 self.explosion_sound.play()
 
-            if event.key == pg.K_c and (keys[pg.K_LCTRL] or keys[pg.K_RCTRL]):
+            if event.key == pg.K_c and ctrl:
+                import pyperclip
                 pyperclip.copy(self.text)
-            elif event.key == pg.K_v and (keys[pg.K_LCTRL] or keys[pg.K_RCTRL]):
-                for char in pyperclip.paste():
-                    self.cursor.return_key() if char == "\n" else self.cursor.insert_char(char)
+            elif event.key == pg.K_v and ctrl:
+                clipboard = getattr(event, "clipboard", None)
+                if clipboard is None:
+                    import pyperclip
+                    clipboard = pyperclip.paste()
+                self.cursor.insert_text(clipboard.replace("\r\n", "\n").replace("\r", "\n"))
+            elif event.key == pg.K_z and ctrl:
+                self.undo()
+            elif event.key == pg.K_y and ctrl:
+                self.redo()
             elif event.key == pg.K_BACKSPACE:
                 self.cursor.backspace()
             elif event.key == pg.K_RETURN:
                 self.cursor.return_key()
             elif event.key == pg.K_TAB:
-                for _ in range(5):
-                    self.cursor.insert_char(' ')
+                self.cursor.insert_text(' ' * 5)
             elif event.unicode in (string.printable + "éèàçµ$£¤%€") and event.unicode != "":
                 self.cursor.insert_char(event.unicode)
 
             self.shake_timer = 0
         elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+            self.cursor.y, self.cursor.x = self.metrics.hit_test(
+                event.pos[0] - self.view[0], event.pos[1] - self.view[1], self.font_size
+            )
             self.dragging = True
             self.drag_start_pos = event.pos
             self.original_view = self.view.copy()
@@ -177,9 +230,7 @@ class TextEngine:
 
         elif event.type == pg.MOUSEWHEEL:
             if (self.font_size > 16 or event.y > 0) and (self.font_size < 500 or event.y < 0):
-                self.font_size = max(16, self.font_size + event.y * 10)
-                self.font = pg.font.SysFont(self.font_name, self.font_size)
-                self.font.set_bold(True)
+                self.set_font(font_size=max(16, self.font_size + event.y * 10))
 
         elif event.type == pg.MOUSEBUTTONUP and event.button == 1:
             self.dragging = False
@@ -187,11 +238,67 @@ class TextEngine:
     def get_view(self):
         return self.view
 
-    def get_lines(self):
-        return self.text.split('\n')
+    @property
+    def text(self) -> str:
+        return self.buffer.get_text()
+
+    @text.setter
+    def text(self, new_text: str):
+        self.set_text(new_text)
+
+    def load_mapped(self, path: str):
+        self.buffer.load_mapped(MappedFile(path))
+        self.history.clear()
+        self.cursor.clamp()
+
+    def open_file(self, path: str, large_file_threshold: int) -> bool:
+        mapped = self.buffer.open_file(path, large_file_threshold)
+        self.history.clear()
+        self.cursor.clamp()
+        return mapped
+
+    def _insert(self, y: int, x: int, text: str) -> tuple[int, int]:
+        if self.journal:
+            self.journal.record_insert(y, x, text)
+        return self.buffer.insert(y, x, text)
+
+    def _delete(self, y: int, x: int, end_y: int, end_x: int) -> str:
+        if self.journal:
+            self.journal.record_delete(y, x, end_y, end_x)
+        return self.buffer.delete(y, x, end_y, end_x)
+
+    def insert_at(self, y: int, x: int, text: str) -> tuple[int, int]:
+        if not text:
+            return y, x
+        self.history.record(y, x, "", text)
+        return self._insert(y, x, text)
+
+    def delete_range(self, y: int, x: int, end_y: int, end_x: int) -> str:
+        removed = self._delete(y, x, end_y, end_x)
+        self.history.record(y, x, removed, "")
+        return removed
+
+    def _swap(self, y: int, x: int, old: str, new: str):
+        if old:
+            self._delete(y, x, *end_of(y, x, old))
+        self.cursor.y, self.cursor.x = self._insert(y, x, new) if new else (y, x)
+
+    def undo(self):
+        edit = self.history.pop_undo()
+        if edit:
+            y, x, removed, inserted, _ = edit
+            self._swap(y, x, inserted, removed)
+
+    def redo(self):
+        edit = self.history.pop_redo()
+        if edit:
+            y, x, removed, inserted, _ = edit
+            self._swap(y, x, removed, inserted)
 
     def set_text(self, new_text: str):
-        self.text = new_text
+        self.buffer.set_text(new_text)
+        self.history.clear()
+        self.cursor.clamp()
 
     def update(self, event: pg.event.Event):
         self.handle_inputs(event)
@@ -202,73 +309,88 @@ class TextEngine:
         if self.background:
             self.screen.blit(self.background_image, (0, 0))
 
+        self.buffer.poll()
         screen_width, screen_height = self.screen.get_size()
         view_x, view_y = self.view
 
-        lines = self.get_lines()
+        scene = (view_x, view_y, self.glyphs.config, self.background, (screen_width, screen_height), tuple(self.active_effects))
+        if scene != self.scene or any(effect in self.effects.animated_effects for effect in self.active_effects):
+            self.main.damage.invalidate()
+            self.scene = scene
+
         font_height = self.font_size
 
         start_line = max(0, int(-view_y // font_height))
-        end_line = min(len(lines), int((screen_height - view_y) // font_height) + 1)
-
-        y_offset = view_y + start_line * font_height
-        for y in range(start_line, end_line):
-            line = lines[y]
-            x_offset = view_x
-            for char in line:
-                char_surface = self.font.render(char, True, self.text_color)
-                char_width = char_surface.get_width()
-
-                if x_offset + char_width < 0:
-                    x_offset += char_width
-                    continue
-                if x_offset > screen_width:
-                    break
+        end_line = min(len(self.buffer), int((screen_height - view_y) // font_height) + 1)
 
-                if self.has_effect("rotate"):
-                    char_surface = self.effects.rotate(char_surface)
+        rotate = self.has_effect("rotate")
+        angle = self.effects.rotation_angle()
+        self.line_surfaces.begin_frame()
 
-                self.screen.blit(char_surface, (x_offset, y_offset))
-                x_offset += char_width
+        y_offset = view_y + start_line * font_height
+        for y, line in enumerate(self.buffer.lines(start_line, end_line), start_line):
+            first, last = self.metrics.visible_columns(y, -view_x, screen_width - view_x)
+            if not rotate:
+                self.line_surfaces.draw(self.screen, y, line, first, last, view_x, y_offset)
+                y_offset += font_height
+                continue
+
+            x_offset = view_x + self.metrics.x_at(y, first)
+            blits = []
+            for char in line[first:last]:
+                blits.append((self.glyphs.get_rotated(char, angle), (x_offset, y_offset)))
+                x_offset += self.glyphs.width(char)
+            self.screen.blits(blits, False)
 
             y_offset += font_height
 
-        self.cursor.draw(self.screen, self.font, self.font_size)
+        with self.profiler.stage("cursor"):
+            self.cursor.draw(self.screen)
 
 
     def draw(self, window: pg.Surface):
-        self.render()
+        self.frame_index += 1
+        step = self.effects.quality["effect_step"]
+        if step > 1 and self.frame_index % step and any(effect in self.effects.animated_effects for effect in self.active_effects):
+            window.blit(self.screen, self.last_offset)
+            return
+
+        with self.profiler.stage("render"):
+            self.render()
         if self.has_effect("particles"):
-            self.effects.update_particles(self.screen)
+            with self.profiler.stage("particles"):
+                self.effects.update_particles(self.screen)
 
-        final = self.screen.copy()
+        final = self.screen
         offset_x, offset_y = 0, 0
         self.effects.cc  = (self.effects.cc + 0.5) % 200_000
         self.effects.rotation = (self.effects.rotation + 1) % 360
         for effect in self.active_effects[:]:
-            if effect == "shake":
-                duration, amplitude = 60, 15
-                if self.shake_timer < duration:
-                    amp = int(amplitude * (1 - self.shake_timer / duration))
-                    offset_x += random.randint(-amp, amp)
-                    offset_y += random.randint(-amp, amp)
-                    self.shake_timer += 1
-                else:
-                    self.remove_effect("shake")
-                    self.shake_timer = 0
-            elif effect == "scanlines":
-                final = self.effects.scanlines(final)
-            elif effect == "chromatic":
-                final = self.effects.chromatic_aberration(final)
-            elif effect == "gradient":
-                final = self.effects.animated_gradient_overlay(final)
-            elif effect == "glitch":
-                final = self.effects.glitch(final)
-            elif effect == "noise":
-                final = self.effects.noise_overlay(final)
-            elif effect == "wave":
-                final = self.effects.wave_distortion(final)
-            elif effect == "blur":
-                final = self.effects.blur(final)
-
-        window.blit(final, (offset_x, offset_y))
+            with self.profiler.stage(effect):
+                if effect == "shake":
+                    duration, amplitude = 60, 15
+                    if self.shake_timer < duration:
+                        amp = int(amplitude * (1 - self.shake_timer / duration))
+                        offset_x += random.randint(-amp, amp)
+                        offset_y += random.randint(-amp, amp)
+                        self.shake_timer += 1
+                    else:
+                        self.remove_effect("shake")
+                        self.shake_timer = 0
+                elif effect == "scanlines":
+                    final = self.post.apply(self.effects.scanlines)
+                elif effect == "chromatic":
+                    final = self.post.apply(self.effects.chromatic_aberration)
+                elif effect == "gradient":
+                    final = self.post.apply(self.effects.animated_gradient_overlay)
+                elif effect == "glitch":
+                    final = self.post.apply(self.effects.glitch)
+                elif effect == "noise":
+                    final = self.post.apply(self.effects.noise_overlay)
+                elif effect == "wave":
+                    final = self.post.apply(self.effects.wave_distortion)
+                elif effect == "blur":
+                    final = self.post.apply(self.effects.blur)
+
+        self.last_offset = (offset_x, offset_y)
+        window.blit(final, self.last_offset)
@@ -25,18 +25,18 @@ class Button:
         mouse_pos = pg.mouse.get_pos()
         local_mouse = (mouse_pos[0] - offset[0], mouse_pos[1] - offset[1])
 
+        rect = self.rect.move(offset)
         if self.rect.collidepoint(local_mouse):
-            canvas.blit(self.surface_hover, self.rect.topleft)
+            canvas.blit(self.surface_hover, rect)
         else:
-            canvas.blit(self.surface_idle, self.rect.topleft)
+            canvas.blit(self.surface_idle, rect)
 
-        text_rect = self.text_surf.get_rect(center=self.pos)
+        text_rect = self.text_surf.get_rect(center=rect.center)
         canvas.blit(self.text_surf, text_rect)
 
     def event(self, event: pg.event.Event, offset: tuple[int, int] = (0, 0)) -> None:
         if event.type == pg.MOUSEBUTTONDOWN:
-            mouse_pos = pg.mouse.get_pos()
-            local_mouse = (mouse_pos[0] - offset[0], mouse_pos[1] - offset[1])
+            local_mouse = (event.pos[0] - offset[0], event.pos[1] - offset[1])
             self.is_clicked = self.rect.collidepoint(local_mouse)
 
 
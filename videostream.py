@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict, deque
+import pygame as pg
+from framecache import FrameCache
+
+
+class VideoStream:
+    def __init__(self, path: str, size: tuple[int, int], ring_frames: int = 8, cache: FrameCache = None):
+        self.path = path
+        self.cache = cache
+        self.size = tuple(size)
+        self.ring_frames = ring_frames
+        self.ring: deque[pg.Surface] = deque()
+        self.current: pg.Surface = None
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        self.thread.start()
+
+    @property
+    def nbytes(self) -> int:
+        return self.size[0] * self.size[1] * 4 * (self.ring_frames + 1)
+
+    def _convert(self, frame) -> pg.Surface:
+        height, width = frame.shape[:2]
+        mode = 'RGB' if frame.shape[2] == 3 else 'RGBA'
+        surface = pg.image.frombuffer(frame.astype('uint8').tobytes(), (width, height), mode)
+        return pg.transform.scale(surface, self.size).convert()
+
+    def _push(self, surface: pg.Surface) -> bool:
+        with self.condition:
+            while len(self.ring) >= self.ring_frames and not self.stopped:
+                self.condition.wait()
+            if self.stopped:
+                return False
+            self.ring.append(surface)
+            return True
+
+    def _decode(self):
+        frames = None
+        if self.cache:
+            try:
+                frames = self.cache.get(self.path, self.size, lambda: self.stopped)
+            except (OSError, ValueError):
+                frames = None
+
+        if frames is not None:
+            while True:
+                for frame in frames:
+                    if not self._push(pg.image.frombuffer(frame, self.size, 'RGB')):
+                        return
+
+        import imageio.v3 as iio
+
+        while not self.stopped:
+            decoded = 0
+            for frame in iio.imiter(self.path):
+                decoded += 1
+                if not self._push(self._convert(frame)):
+                    return
+            if not decoded:
+                return
+
+    def advance(self):
+        with self.condition:
+            if self.ring:
+                self.current = self.ring.popleft()
+                self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.stopped = True
+            self.ring.clear()
+            self.condition.notify()
+        self.current = None
+
+
+class VideoLibrary:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ring_frames: int = 8, cache: FrameCache = None):
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.ring_frames = ring_frames
+        self.streams: OrderedDict[tuple, VideoStream] = OrderedDict()
+        self.users: dict[tuple, int] = {}
+
+    def acquire(self, path: str, size: tuple[int, int]) -> VideoStream:
+        key = (path, tuple(size))
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = VideoStream(path, size, self.ring_frames, self.cache)
+        self.streams.move_to_end(key)
+        self.users[key] = self.users.get(key, 0) + 1
+        self._trim()
+        return stream
+
+    def release(self, stream: VideoStream):
+        key = (stream.path, stream.size)
+        self.users[key] -= 1
+        self._trim()
+
+    def _trim(self):
+        total = sum(stream.nbytes for stream in self.streams.values())
+        for key in list(self.streams):
+            if total <= self.max_bytes:
+                return
+            if not self.users.get(key):
+                stream = self.streams.pop(key)
+                self.users.pop(key, None)
+                stream.close()
+                total -= stream.nbytes
+
+    def tick(self):
+        for key, stream in self.streams.items():
+            if self.users.get(key):
+                stream.advance()
+
+    def stats(self) -> dict:
+        return {
+            "streams": len(self.streams),
+            "active": sum(1 for count in self.users.values() if count),
+            "bytes": sum(stream.nbytes for stream in self.streams.values()),
+            "capacity": self.max_bytes
+        }